@@ -0,0 +1,58 @@
+"""Benchmark: schema-compiled parse_quest_element vs. one find() per field
+
+Run from the repository root:
+
+    python benchmarks/bench_parser.py [rows ...]
+"""
+import os
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_serializer import make_quest
+from quest_model import QUEST_FIELD_NAMES, QuestInfo, QuestCondition, QuestGoal, RewardQuantity
+from quest_xml import parse_quest_element, quest_file_text
+
+
+def _int(elem):
+    return int(elem.text) if elem is not None and elem.text else 0
+
+
+def find_parse(root):
+    """The original import: a find() per field and per row value"""
+    quest = QuestInfo()
+    for field_name in QUEST_FIELD_NAMES:
+        elem = root.find(field_name)
+        if elem is not None and elem.text:
+            quest.set_field(field_name, elem.text)
+    quest.conditions = [QuestCondition(*[_int(elem.find(name)) for name in QuestCondition.field_names()])
+                        for elem in root.findall("QuestConditions/QuestCondition")]
+    quest.goals = [QuestGoal(*[_int(elem.find(name)) for name in QuestGoal.field_names()])
+                   for elem in root.findall("QuestGoals/QuestGoal")]
+    quest.rewards = []
+    for elem in root.findall("RewardQuantities/RewardQuantity"):
+        quest.rewards.append(RewardQuantity(
+            _int(elem.find("Reward")), _int(elem.find("RewardType")),
+            _int(elem.find("QuestRewardMoney/QuestRewardMoneyItem/RewardMoney")),
+            _int(elem.find("QuestRewardItems/QuestRewardItemsItem/RewardItem")),
+            _int(elem.find("QuestRewardItems/QuestRewardItemsItem/RewardAmount"))))
+    return quest
+
+
+def main(sizes):
+    print(f"{'rows':>8} {'find() ms':>10} {'compiled ms':>12} {'speedup':>8}")
+    for rows in sizes:
+        root = ET.fromstring(quest_file_text(make_quest(rows)).encode("utf-8"))
+        if find_parse(root).to_dict() != parse_quest_element(root).to_dict():
+            raise SystemExit(f"Parse mismatch at {rows} rows")
+
+        number = max(1, 2000 // max(rows, 1))
+        old = min(timeit.repeat(lambda: find_parse(root), number=number, repeat=3)) / number
+        new = min(timeit.repeat(lambda: parse_quest_element(root), number=number, repeat=3)) / number
+        print(f"{rows:>8} {old * 1000:>10.2f} {new * 1000:>12.2f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000])
@@ -0,0 +1,152 @@
+"""Benchmark: lossless import of unmodeled XML (passthrough), with round-trip checks
+
+Checks before timing, exiting on the first failure:
+
+- a quest with QuestItems, Event, RewardUnk and unknown elements is
+  written back byte for byte, also from UTF-16 sources
+- the compact profile re-indents kept fragments, and compact output read
+  back writes the pretty source again
+- passthrough is never taken from dicts (JSON, CSV, HTTP input)
+- files without kept XML are streamed by ET.iterparse alone; span
+  tracking starts at the first quest that needs it
+- RewardType edits drop passthrough of the old layout, in the popup
+  (carried_passthrough) and bulk (set_column) paths alike
+
+Then times streaming plain and passthrough-carrying files. Run from the
+repository root:
+
+    python benchmarks/bench_passthrough.py [quests ...]
+"""
+import codecs
+import io
+import os
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_serializer import make_quest
+from quest_model import QuestInfo
+from quest_schema import QUEST_SECTIONS
+from quest_xml import (
+    COMPACT_PROFILE, XML_FILE_HEADER, QuestSpans, iter_parsed_quests, iter_quests, load_quest,
+    parse_quest_element, quest_file_text
+)
+
+
+def source_quest():
+    """Pretty quest file text holding everything the model does not"""
+    text = quest_file_text(make_quest(3))
+    text = text.replace("<RewardUnk>0</RewardUnk>", "<RewardUnk>7</RewardUnk>", 1)
+    text = text.replace("  <QuestItems/>\n", '  <QuestItems>\n    <QuestItem id="5">12&amp;3</QuestItem>\n  </QuestItems>\n')
+    text = text.replace("<EventId>0</EventId>", "<EventId>41</EventId>", 1)
+    text = text.replace("  <Expert/>\n", '  <Expert/>\n  <Extra a=">"/>\n  <Flag x=\'/\'>\n    <!-- a > b -->\n  </Flag>\n')
+    text = text.replace("  <UniqID>", "  <Lead>é</Lead>\n  <UniqID>")
+    text = text.replace("      <SubValue1>0</SubValue1>\n", "      <SubValue1>0</SubValue1>\n      <GoalNote>x/></GoalNote>\n", 1)
+    return text
+
+
+def check(condition, message):
+    if not condition:
+        raise SystemExit(f"FAIL: {message}")
+
+
+def body(text):
+    """Document without its XML declaration"""
+    return text.split("\n", 1)[1]
+
+
+def check_round_trips(source):
+    quest = load_quest(io.BytesIO(source.encode("utf-8")))
+    check(quest.passthrough and any(row.passthrough for row in quest.rewards), "passthrough not captured")
+    check(quest_file_text(quest) == source, "pretty round trip changed the source")
+
+    for name, data in (("UTF-16", source.replace('"UTF-8"', '"UTF-16"').encode("utf-16")),
+                       ("UTF-16LE", source.replace('"UTF-8"', '"UTF-16LE"').encode("utf-16-le")),
+                       ("UTF-16BE", codecs.BOM_UTF16_BE + source.replace('"UTF-8"', '"UTF-16"').encode("utf-16-be"))):
+        check(quest_file_text(load_quest(io.BytesIO(data))) == source, f"{name} source not reproduced")
+
+    compact = quest_file_text(quest, COMPACT_PROFILE)
+    for fragment in ('<QuestItems><QuestItem id="5">12&amp;3</QuestItem></QuestItems>',
+                     "<Flag x='/'><!-- a > b --></Flag>", "<GoalNote>x/></GoalNote>"):
+        check(fragment in compact, f"compact output did not re-indent {fragment}")
+    ET.fromstring(compact.encode("utf-8"))
+    check(quest_file_text(load_quest(io.BytesIO(compact.encode("utf-8")))) == source,
+          "compact output read back does not write the pretty source")
+
+
+def check_dict_input():
+    quest = QuestInfo.from_dict({"UniqID": "1", "passthrough": {"Event": "<Event><bad"},
+                                 "rewards": [{"RewardType": 0, "passthrough": "+"}]})
+    check(not quest.passthrough and quest.rewards[0].passthrough is None, "passthrough read from a dict")
+    check("passthrough" not in quest.to_dict(), "passthrough written to a dict")
+    ET.fromstring(quest_file_text(quest).encode("utf-8"))
+
+
+def check_stream_paths(source):
+    plain = [body(quest_file_text(make_quest(2 + i))) for i in range(4)]
+    kept = body(source)
+    for parts, first_span in ((plain, None), (plain[:2] + [kept] + plain[2:] + [kept], 2)):
+        data = (XML_FILE_HEADER + "<Quests>\n" + "".join(parts) + "</Quests>\n").encode("utf-8")
+        spans_at = []
+
+        def parse(position, elem, spans):
+            if isinstance(spans, QuestSpans):
+                spans_at.append(position)
+            return position, quest_file_text(parse_quest_element(elem, spans=spans))
+
+        results = list(iter_parsed_quests(io.BytesIO(data), parse))
+        check([position for position, _ in results] == list(range(len(parts))), "quests skipped or repeated")
+        check([body(text) for _, text in results] == parts, "streamed quests not reproduced")
+        expected = list(range(first_span, len(parts))) if first_span is not None else []
+        check(spans_at == expected, f"span tracking used for quests {spans_at}, expected {expected}")
+
+
+def check_reward_type_edits(source):
+    quest = load_quest(io.BytesIO(source.encode("utf-8")))
+    index = next(i for i, row in enumerate(quest.rewards) if row.passthrough)
+    old = quest.rewards[index]
+    section = QUEST_SECTIONS["rewards"]
+    item = type(old)(**dict(old.to_dict(), RewardType=2))
+    check(section.carried_passthrough(old, item) is None, "popup edit kept money-layout passthrough")
+    quest.set_column("rewards", [index], "RewardType", 2)
+    quest.set_column("rewards", [index], "RewardType", 0)
+    check(quest.rewards[index].passthrough is None, "bulk edit kept money-layout passthrough")
+
+
+def stream_time(path):
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        sum(1 for _ in iter_quests(path))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(sizes):
+    source = source_quest()
+    check_round_trips(source)
+    check_dict_input()
+    check_stream_paths(source)
+    check_reward_type_edits(source)
+    print("round-trip checks passed")
+
+    print(f"{'quests':>8} {'plain ms':>10} {'passthrough ms':>15} {'ratio':>6}")
+    plain = body(quest_file_text(make_quest(3)))
+    kept = body(source)
+    with tempfile.TemporaryDirectory() as temp:
+        for count in sizes:
+            times = []
+            for name, part in (("plain", plain), ("kept", kept)):
+                path = os.path.join(temp, f"{name}-{count}.xml")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(XML_FILE_HEADER + "<Quests>\n" + part * count + "</Quests>\n")
+                times.append(stream_time(path))
+            print(f"{count:>8} {times[0] * 1000:>10.1f} {times[1] * 1000:>15.1f} {times[1] / times[0]:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [100, 1000, 10000])
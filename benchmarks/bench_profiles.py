@@ -0,0 +1,58 @@
+"""Benchmark: pretty vs. compact output profile, file size and parse time
+
+Writes a library in both profiles and times what a server does at startup:
+parse every file and build the quest models. Run from the repository root:
+
+    python benchmarks/bench_profiles.py [library_dir]
+
+Without a directory, a synthetic library of row-heavy quests is used.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_serializer import make_quest
+from quest_batch import load_quests, write_quests
+from quest_library import iter_xml_files
+from quest_xml import OUTPUT_PROFILES, iter_quests
+
+
+def library_quests(directory):
+    quests = []
+    for path, _ in iter_xml_files(directory):
+        quests.extend(load_quests(os.path.join(directory, *path.split("/"))))
+    return quests
+
+
+def parse_all(paths):
+    return sum(1 for path in paths for _ in iter_quests(path))
+
+
+def main(directory=None):
+    quests = library_quests(directory) if directory else [make_quest(5 + i % 40) for i in range(500)]
+    for i, quest in enumerate(quests):
+        # Synthetic quests share a UniqID; give each its own file
+        if not directory:
+            quest.UniqID = str(10000 + i)
+
+    print(f"{len(quests)} quests")
+    print(f"{'profile':>8} {'bytes':>12} {'parse ms':>10}")
+    with tempfile.TemporaryDirectory() as temp:
+        for name, profile in OUTPUT_PROFILES.items():
+            out = os.path.join(temp, name)
+            paths = write_quests(quests, out, profile=profile)
+            size = sum(os.path.getsize(path) for path in paths)
+            best = None
+            for _ in range(3):
+                start = time.perf_counter()
+                parse_all(paths)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{name:>8} {size:>12} {best * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:2])
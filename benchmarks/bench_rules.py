@@ -0,0 +1,50 @@
+"""Benchmark: vectorized (NumPy) vs. row-by-row rule validation
+
+Run from the repository root (NumPy is needed for the vectorized column):
+
+    python benchmarks/bench_rules.py [reward_rows ...]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quest_model import QuestInfo, QuestGoal, RewardQuantity
+from quest_rules import np, validate_quests
+
+ROWS_PER_QUEST = 20
+
+
+def make_quest(index):
+    """Mostly valid quest; about one reward row in a hundred breaks a rule"""
+    quest = QuestInfo(UniqID=str(index))
+    quest.goals = [QuestGoal(4, 90000 + index, 0, 1, 0, 0, 0)]
+    quest.rewards = [RewardQuantity(0, 0, 0 if (index + i) % 100 == 0 else 100, 0, 0) if i % 2 else
+                     RewardQuantity(0, 2, 0, 400000 + i, 1)
+                     for i in range(ROWS_PER_QUEST)]
+    return quest
+
+
+def timed(quests, vectorized):
+    start = time.perf_counter()
+    violations = validate_quests(quests, vectorized=vectorized)
+    return time.perf_counter() - start, violations
+
+
+def main(sizes):
+    print(f"{'rows':>8} {'rows ms':>10} {'numpy ms':>10} {'violations':>11}")
+    for rows in sizes:
+        quests = [make_quest(i) for i in range(max(1, rows // ROWS_PER_QUEST))]
+        slow, expected = timed(quests, False)
+        if np is None:
+            print(f"{rows:>8} {slow * 1000:>10.1f} {'-':>10} {len(expected):>11}")
+            continue
+        fast, violations = timed(quests, True)
+        if violations != expected:
+            raise SystemExit(f"Result mismatch at {rows} rows")
+        print(f"{rows:>8} {slow * 1000:>10.1f} {fast * 1000:>10.1f} {len(violations):>11}")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000])
@@ -0,0 +1,67 @@
+"""Benchmark: single-pass serializer vs. ElementTree + minidom reparse
+
+Run from the repository root:
+
+    python benchmarks/bench_serializer.py [rows ...]
+"""
+import os
+import sys
+import timeit
+import xml.etree.ElementTree as ET
+from xml.dom import minidom
+from xml.parsers.expat import ExpatError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quest_model import QuestInfo, QuestCondition, QuestGoal, RewardQuantity
+from quest_xml import build_quest_element, pretty_quest_xml
+
+
+def make_quest(rows):
+    """Quest with `rows` conditions, goals and rewards (mixed reward types)"""
+    quest = QuestInfo()
+    quest.conditions = [QuestCondition(i % 4, i, 0) for i in range(rows)]
+    quest.goals = [QuestGoal(4, 90000 + i, 0, 1, 0, 0, 0) for i in range(rows)]
+    quest.rewards = [RewardQuantity(0, i % 3, 100 * i, 400000 + i, i % 5) for i in range(rows)]
+    return quest
+
+
+def minidom_pretty(quest):
+    """The previous preview path: build tree, tostring, reparse, toprettyxml"""
+    rough_string = ET.tostring(build_quest_element(quest), 'utf-8')
+    return minidom.parseString(rough_string).toprettyxml(indent="  ")
+
+
+def check_invalid_text():
+    """Text XML cannot hold is rejected, as the minidom reparse rejected it"""
+    quest = make_quest(1)
+    quest.TitleTab = "a\x01b"
+    try:
+        minidom_pretty(quest)
+    except ExpatError:
+        pass
+    else:
+        raise SystemExit("minidom accepted a control character")
+    try:
+        pretty_quest_xml(quest)
+    except ValueError:
+        return
+    raise SystemExit("Single-pass serializer wrote a control character")
+
+
+def main(sizes):
+    check_invalid_text()
+    print(f"{'rows':>8} {'minidom ms':>12} {'single-pass ms':>15} {'speedup':>8}")
+    for rows in sizes:
+        quest = make_quest(rows)
+        if minidom_pretty(quest) != pretty_quest_xml(quest):
+            raise SystemExit(f"Output mismatch at {rows} rows")
+
+        number = max(1, 2000 // max(rows, 1))
+        old = min(timeit.repeat(lambda: minidom_pretty(quest), number=number, repeat=3)) / number
+        new = min(timeit.repeat(lambda: pretty_quest_xml(quest), number=number, repeat=3)) / number
+        print(f"{rows:>8} {old * 1000:>12.2f} {new * 1000:>15.2f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000])
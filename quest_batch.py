@@ -0,0 +1,149 @@
+"""Batch quest sources and output: JSON/CSV/XML loaders and parallel writers"""
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from quest_ids import AUTO_IDS
+from quest_library import FileImportResult, import_quest_file
+from quest_model import QuestInfo, ROW_TYPES
+from quest_xml import PRETTY_PROFILE, iter_quests, write_quest_file
+
+# Source formats understood by load_quests, by file extension
+SOURCE_FORMATS = {".json": "json", ".csv": "csv", ".xml": "xml"}
+
+
+def source_format(path, fmt=None):
+    """Resolve the format of a source file ("auto" uses the extension)"""
+    if fmt and fmt != "auto":
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SOURCE_FORMATS:
+        raise ValueError(f"Cannot tell the format of {path}; use one of {', '.join(SOURCE_FORMATS)}")
+    return SOURCE_FORMATS[ext]
+
+
+def load_json_quests(path):
+    """Quests from JSON: one quest object, a list of them, or {"quests": [...]}"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("quests", [data])
+    return [QuestInfo.from_dict(item) for item in data]
+
+
+def load_csv_quests(path):
+    """Quests from CSV, one quest per row with basic/text field columns"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return [QuestInfo.from_dict(row) for row in csv.DictReader(f)]
+
+
+def _read_sheet(path):
+    """Rows of a CSV sheet as (line number, dict) pairs"""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or "UniqID" not in reader.fieldnames:
+            raise ValueError(f"{path}: sheet has no UniqID column")
+        return [(reader.line_num, row) for row in reader]
+
+
+def load_quest_sheets(quests_path, conditions_path=None, goals_path=None, rewards_path=None):
+    """Join a quest sheet with its child sheets, keyed by UniqID
+
+    The quest sheet has one row per quest (basic/text field columns); each
+    child sheet has a UniqID column plus the row's field columns, one row
+    per condition/goal/reward in order. Child rows are grouped into a hash
+    index by UniqID in one pass and attached to their quest, so the join is
+    linear in the total row count.
+
+    Quests whose UniqID is empty or "auto" (to be allocated later) cannot
+    have child rows. Returns (quests, orphans), where orphans lists (sheet,
+    line, UniqID) for child rows whose UniqID has no quest.
+    """
+    quests = {}
+    for line, row in _read_sheet(quests_path):
+        uniq_id = (row.get("UniqID") or "").strip()
+        if uniq_id.lower() in AUTO_IDS:
+            # Not joinable; keyed by line so several can coexist
+            uniq_id = f"{AUTO_IDS[1]}:{line}"
+        elif uniq_id in quests:
+            raise ValueError(f"{quests_path}:{line}: duplicate UniqID {uniq_id}")
+        try:
+            quests[uniq_id] = QuestInfo.from_dict(row)
+        except ValueError as e:
+            raise ValueError(f"{quests_path}:{line}: {e}")
+
+    orphans = []
+    children = (("conditions", conditions_path), ("goals", goals_path), ("rewards", rewards_path))
+    for section, path in children:
+        if not path:
+            continue
+        row_class = ROW_TYPES[section]
+        grouped = {}
+        for line, row in _read_sheet(path):
+            uniq_id = (row.get("UniqID") or "").strip()
+            if uniq_id not in quests:
+                orphans.append((path, line, uniq_id))
+                continue
+            try:
+                grouped.setdefault(uniq_id, []).append(row_class.from_dict(row))
+            except ValueError as e:
+                raise ValueError(f"{path}:{line}: {e}")
+        for uniq_id, rows in grouped.items():
+            setattr(quests[uniq_id], section, rows)
+            quests[uniq_id].touch()
+
+    return list(quests.values()), orphans
+
+
+def load_quests(path, fmt=None):
+    """Load quest definitions from a JSON, CSV or XML file"""
+    fmt = source_format(path, fmt)
+    if fmt == "json":
+        return load_json_quests(path)
+    if fmt == "csv":
+        return load_csv_quests(path)
+    if fmt == "xml":
+        return list(iter_quests(path))
+    raise ValueError(f"Unknown source format: {fmt}")
+
+
+def validate_source(path, fmt=None):
+    """Load a source file, collecting problems instead of raising (a FileImportResult)"""
+    if source_format(path, fmt) == "xml":
+        return import_quest_file(path)
+    result = FileImportResult(path)
+    try:
+        result.quests = load_quests(path, fmt)
+    except (ValueError, TypeError, KeyError, OSError) as e:
+        result.errors.append(str(e))
+    return result
+
+
+def _write_one(args):
+    """Pool worker: write one quest, returning its path"""
+    quest, file_path, profile = args
+    write_quest_file(quest, file_path, profile)
+    return file_path
+
+
+def write_quests(quests, directory, jobs=1, chunksize=32, profile=PRETTY_PROFILE):
+    """Write each quest to directory/<file_name()> atomically, over jobs processes
+
+    Returns the written paths in input order.
+    """
+    os.makedirs(directory, exist_ok=True)
+    tasks = [(quest, os.path.join(directory, quest.file_name()), profile) for quest in quests]
+    if jobs == 1 or len(tasks) < 2:
+        return [_write_one(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_write_one, tasks, chunksize=chunksize))
+
+
+def duplicate_file_names(quests):
+    """File names produced by more than one quest (later writes would win)"""
+    seen, duplicates = set(), set()
+    for quest in quests:
+        name = quest.file_name()
+        (duplicates if name in seen else seen).add(name)
+    return sorted(duplicates)
@@ -0,0 +1,357 @@
+"""Headless command line for batch quest generation, import and validation
+
+Usage (no display needed):
+
+    python quest_xml_gui.py generate quests.json -o out/ --jobs 4
+    python quest_xml_gui.py sheets quests.csv --goals goals.csv --rewards rewards.csv -o out/
+    python quest_xml_gui.py generate quests.json -o out/ --incremental --profile compact
+    python quest_xml_gui.py watch designs/ -o out/ --interval 1
+    python quest_xml_gui.py delta out/ --since 12 -o patch.zip
+    python quest_xml_gui.py pack library/ -o quests.qpak
+    python quest_xml_gui.py unpack quests.qpak -o library/
+    python quest_xml_gui.py strings library/ -o catalog/
+    python quest_xml_gui.py serve --port 8765 --workers 8
+    python quest_xml_gui.py xref library/ --tables tables/
+    python quest_xml_gui.py ids library/ --range 3000-3999 --allocate 5
+    python quest_xml_gui.py import library/ --jobs 8 --json quests.json
+    python quest_xml_gui.py validate library/ quests.csv
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from quest_batch import load_quests, load_quest_sheets, write_quests, duplicate_file_names, validate_source
+from quest_manifest import BuildManifest
+from quest_pack import write_quest_pack, unpack_quest_pack
+from quest_strings import CatalogReport, export_catalog
+from quest_xml import OUTPUT_PROFILES
+from quest_watch import QuestWatcher
+from quest_server import serve
+from quest_rules import validate_quests
+from quest_xref import load_id_tables
+from quest_ids import AUTO_IDS, ID_RANGE_SETTING, IdAllocator, assign_ids, find_collisions
+from quest_library import QuestLibraryIndex, import_directory, iter_xml_files, ImportReport
+
+
+def expand_sources(sources):
+    """Expand directories into the quest XML files below them"""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(os.path.join(source, *path.split("/")) for path, _ in iter_xml_files(source)))
+        else:
+            paths.append(source)
+    return paths
+
+
+def warn_passthrough_dropped(quests, target):
+    """Warn that JSON output leaves out the source XML kept from imported files"""
+    count = sum(1 for quest in quests if quest.has_passthrough())
+    if count:
+        print(f"warning: {count} quests keep XML the model does not hold (QuestItems, Event, "
+              f"RewardUnk or unknown elements); {target} does not include it", file=sys.stderr)
+
+
+def write_generated(quests, args):
+    """Write quests to args.output, warning about file name and UniqID clashes"""
+    if args.library:
+        with QuestLibraryIndex(args.library) as index:
+            index.scan()
+            if any(quest.UniqID.strip().lower() in AUTO_IDS for quest in quests):
+                assigned = assign_ids(quests, IdAllocator.from_index(index, args.id_range))
+                print(f"Assigned {len(assigned)} UniqIDs from the library range")
+            for uniq_id, description in find_collisions(quests, index):
+                print(f"warning: UniqID {uniq_id}: {description}", file=sys.stderr)
+
+    for name in duplicate_file_names(quests):
+        print(f"warning: more than one quest writes {name}; the last one wins", file=sys.stderr)
+
+    if args.incremental:
+        manifest = BuildManifest(args.output)
+        result = manifest.update(quests, jobs=args.jobs, profile=OUTPUT_PROFILES[args.profile])
+        print(f"Build {manifest.build} in {args.output}: {len(result['added'])} added, "
+              f"{len(result['changed'])} changed, {len(result['removed'])} removed, "
+              f"{len(result['unchanged'])} unchanged")
+        return 0
+
+    paths = write_quests(quests, args.output, jobs=args.jobs, profile=OUTPUT_PROFILES[args.profile])
+    print(f"Generated {len(paths)} quest files in {args.output}")
+    return 0
+
+
+def cmd_generate(args):
+    """Read quest definitions and write one XML file per quest"""
+    quests = []
+    for path in expand_sources(args.sources):
+        quests.extend(load_quests(path, args.format))
+    return write_generated(quests, args)
+
+
+def cmd_sheets(args):
+    """Join spreadsheet exports into quests and write one XML file per quest"""
+    quests, orphans = load_quest_sheets(args.quests, args.conditions, args.goals, args.rewards)
+    for path, line, uniq_id in orphans:
+        print(f"warning: {path}:{line}: no quest with UniqID {uniq_id!r}; row skipped", file=sys.stderr)
+    return write_generated(quests, args)
+
+
+def cmd_watch(args):
+    """Regenerate quests as their sources change, until interrupted"""
+    watcher = QuestWatcher(args.sources, args.output, fmt=args.format, profile=OUTPUT_PROFILES[args.profile],
+                           jobs=args.jobs, debounce=args.debounce)
+    print(f"Watching {', '.join(args.sources)} (Ctrl+C to stop)")
+    watcher.run(interval=args.interval)
+    return 0
+
+
+def cmd_delta(args):
+    """Package the quests that changed since an earlier incremental build"""
+    manifest = BuildManifest(args.directory)
+    if not manifest.build:
+        print(f"error: no build manifest in {args.directory}", file=sys.stderr)
+        return 1
+    delta = manifest.write_delta(args.since, args.output)
+    print(f"Delta {delta['since']} -> {delta['build']}: {len(delta['added'])} added, "
+          f"{len(delta['changed'])} changed, {len(delta['removed'])} removed; wrote {args.output}")
+    return 0
+
+
+def cmd_pack(args):
+    """Compile quest sources into a binary quest pack"""
+    quests = []
+    for path in expand_sources(args.sources):
+        quests.extend(load_quests(path, args.format))
+    count = write_quest_pack(quests, args.output)
+    print(f"Packed {count} quests into {args.output} ({os.path.getsize(args.output)} bytes)")
+    return 0
+
+
+def cmd_unpack(args):
+    """Convert a binary quest pack back to quest XML files"""
+    paths = unpack_quest_pack(args.pack, args.output, jobs=args.jobs, profile=OUTPUT_PROFILES[args.profile])
+    print(f"Unpacked {len(paths)} quest files into {args.output}")
+    return 0
+
+
+def cmd_strings(args):
+    """Report text deduplication savings and optionally write a catalog export"""
+    quests = []
+    for path in expand_sources(args.sources):
+        quests.extend(load_quests(path, args.format))
+    print(CatalogReport(quests).format())
+    if args.output:
+        warn_passthrough_dropped(quests, "the catalog export")
+        catalog = export_catalog(quests, args.output)
+        print(f"Wrote {len(quests)} quests and {len(catalog)} strings to {args.output}")
+    return 0
+
+
+def cmd_serve(args):
+    """Run the local HTTP generation service"""
+    serve(args.host, args.port, workers=args.workers, verbose=args.verbose)
+    return 0
+
+
+def cmd_import(args):
+    """Import a directory of quest XML files and report problems"""
+    report = import_directory(args.directory, jobs=args.jobs)
+    print(report.format(limit=args.limit))
+    if args.json:
+        warn_passthrough_dropped(report.quests, f"--json {args.json}")
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"quests": [quest.to_dict() for quest in report.quests]}, f, ensure_ascii=False, indent=1)
+        print(f"Wrote {len(report.quests)} quests to {args.json}")
+    return 1 if report.failed else 0
+
+
+def cmd_validate(args):
+    """Check quest sources without writing anything"""
+    paths = expand_sources(args.sources)
+    if args.jobs == 1 or len(paths) < 2:
+        results = [validate_source(path, args.format) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+            results = list(executor.map(validate_source, paths, [args.format] * len(paths), chunksize=32))
+    report = ImportReport(os.getcwd(), results)
+    print(report.format(limit=args.limit))
+
+    violations = validate_quests(report.quests)
+    print(f"Rule warnings: {len(violations)}")
+    for violation in violations[:args.limit]:
+        print(f"  {violation}")
+    if len(violations) > args.limit:
+        print(f"... and {len(violations) - args.limit} more")
+    return 1 if report.failed or (args.strict and violations) else 0
+
+
+def cmd_xref(args):
+    """Check quest ID references against the item/NPC/monster/map tables"""
+    xref = load_id_tables(args.tables)
+    if not xref.tables:
+        print(f"error: no ID tables found in {args.tables}", file=sys.stderr)
+        return 1
+    if xref.cache_error:
+        print(f"warning: {xref.cache_error}", file=sys.stderr)
+    quests = []
+    for path in expand_sources(args.sources):
+        quests.extend(load_quests(path, args.format))
+
+    problems = xref.check_quests(quests)
+    tables = ", ".join(f"{name} ({len(table)})" for name, table in xref.tables.items())
+    print(f"Checked {len(quests)} quests against {tables}: {len(problems)} unknown IDs")
+    for _, uniq_id, message in problems[:args.limit]:
+        print(f"  UniqID {uniq_id}: {message}")
+    if len(problems) > args.limit:
+        print(f"... and {len(problems) - args.limit} more")
+    return 1 if problems else 0
+
+
+def cmd_ids(args):
+    """Report UniqID collisions and free IDs in a library; optionally allocate some"""
+    with QuestLibraryIndex(args.library) as index:
+        index.scan()
+        collisions = index.collisions()
+        print(f"{index.count()} quests indexed; {len(collisions)} UniqIDs used more than once")
+        for uniq_id, rows in list(collisions.items())[:args.limit]:
+            print(f"  {uniq_id}: {', '.join(row['path'] for row in rows)}")
+
+        if args.range or index.get_setting(ID_RANGE_SETTING):
+            allocator = IdAllocator.from_index(index, args.range)
+            print(f"Range {allocator.low}-{allocator.high}: {allocator.free_count()} free, "
+                  f"next {allocator.next_free()}")
+            if args.allocate:
+                print("Allocated:", " ".join(str(uniq_id) for uniq_id in allocator.allocate(args.allocate)))
+        elif args.allocate:
+            print("error: no UniqID range configured; pass --range", file=sys.stderr)
+            return 1
+    return 1 if collisions else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="quest_xml_gui.py",
+                                     description="Quest XML Generator (run without a command to open the GUI)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write quest XML from JSON, CSV or XML definitions")
+    generate.add_argument("sources", nargs="+", help="definition files or directories of quest XML")
+    generate.add_argument("-o", "--output", required=True, help="output directory")
+    generate.add_argument("--format", choices=("auto", "json", "csv", "xml"), default="auto")
+    generate.add_argument("--jobs", type=int, default=1, help="worker processes (default: 1)")
+    generate.add_argument("--incremental", action="store_true",
+                          help="keep a build manifest and only rewrite quests whose output changed")
+    generate.add_argument("--profile", choices=tuple(OUTPUT_PROFILES), default="pretty",
+                          help="pretty (indented, as previewed) or compact (minified) XML")
+    generate.add_argument("--library", help="quest library to check UniqIDs against and allocate \"auto\" IDs from")
+    generate.add_argument("--id-range", help="UniqID range for allocation, e.g. 3000-3999 (stored in the library)")
+    generate.set_defaults(func=cmd_generate)
+
+    sheets = commands.add_parser("sheets", help="write quest XML from a quest sheet and its child sheets (CSV)")
+    sheets.add_argument("quests", help="quest sheet: one row per quest")
+    sheets.add_argument("--conditions", help="condition sheet keyed by UniqID")
+    sheets.add_argument("--goals", help="goal sheet keyed by UniqID")
+    sheets.add_argument("--rewards", help="reward sheet keyed by UniqID")
+    sheets.add_argument("-o", "--output", required=True, help="output directory")
+    sheets.add_argument("--jobs", type=int, default=1, help="worker processes (default: 1)")
+    sheets.add_argument("--incremental", action="store_true",
+                        help="keep a build manifest and only rewrite quests whose output changed")
+    sheets.add_argument("--profile", choices=tuple(OUTPUT_PROFILES), default="pretty",
+                        help="pretty (indented, as previewed) or compact (minified) XML")
+    sheets.add_argument("--library", help="quest library to check UniqIDs against and allocate \"auto\" IDs from")
+    sheets.add_argument("--id-range", help="UniqID range for allocation, e.g. 3000-3999 (stored in the library)")
+    sheets.set_defaults(func=cmd_sheets)
+
+    watch = commands.add_parser("watch", help="regenerate quests whenever their sources change")
+    watch.add_argument("sources", nargs="+", help="definition files or directories to poll")
+    watch.add_argument("-o", "--output", required=True, help="output directory (keeps a build manifest)")
+    watch.add_argument("--format", choices=("auto", "json", "csv", "xml"), default="auto")
+    watch.add_argument("--profile", choices=tuple(OUTPUT_PROFILES), default="pretty",
+                       help="pretty (indented, as previewed) or compact (minified) XML")
+    watch.add_argument("--interval", type=float, default=1.0, help="seconds between polls (default: 1)")
+    watch.add_argument("--debounce", type=float, default=0.5,
+                       help="seconds without changes before rebuilding (default: 0.5)")
+    watch.add_argument("--jobs", type=int, default=1, help="worker processes (default: 1)")
+    watch.set_defaults(func=cmd_watch)
+
+    delta = commands.add_parser("delta", help="package quests added, changed or removed since a build")
+    delta.add_argument("directory", help="output directory of incremental builds")
+    delta.add_argument("--since", type=int, required=True, help="build number the target already has")
+    delta.add_argument("-o", "--output", required=True, help="delta package (.zip) to write")
+    delta.set_defaults(func=cmd_delta)
+
+    pack = commands.add_parser("pack", help="compile quests into a binary quest pack")
+    pack.add_argument("sources", nargs="+", help="definition files or directories of quest XML")
+    pack.add_argument("-o", "--output", required=True, help="pack file to write")
+    pack.add_argument("--format", choices=("auto", "json", "csv", "xml"), default="auto")
+    pack.set_defaults(func=cmd_pack)
+
+    unpack = commands.add_parser("unpack", help="write the quests of a binary pack back out as XML")
+    unpack.add_argument("pack")
+    unpack.add_argument("-o", "--output", required=True, help="output directory")
+    unpack.add_argument("--jobs", type=int, default=1, help="worker processes (default: 1)")
+    unpack.add_argument("--profile", choices=tuple(OUTPUT_PROFILES), default="pretty",
+                        help="pretty (indented, as previewed) or compact (minified) XML")
+    unpack.set_defaults(func=cmd_unpack)
+
+    strings = commands.add_parser("strings", help="export quests with text fields in a shared string catalog")
+    strings.add_argument("sources", nargs="+", help="definition files or directories of quest XML")
+    strings.add_argument("-o", "--output", help="catalog export directory (omit to only report savings)")
+    strings.add_argument("--format", choices=("auto", "json", "csv", "xml"), default="auto")
+    strings.set_defaults(func=cmd_strings)
+
+    server = commands.add_parser("serve", help="run a local HTTP service that turns quest JSON into XML")
+    server.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: 127.0.0.1)")
+    server.add_argument("--port", type=int, default=8765)
+    server.add_argument("--workers", type=int, default=8, help="connection worker threads (default: 8)")
+    server.add_argument("--verbose", action="store_true", help="log every request")
+    server.set_defaults(func=cmd_serve)
+
+    xref = commands.add_parser("xref", help="check quest IDs against item/NPC/monster/map tables")
+    xref.add_argument("sources", nargs="+", help="definition files or directories of quest XML")
+    xref.add_argument("--tables", required=True,
+                      help="directory with items/npcs/monsters/maps .csv or .xml dumps")
+    xref.add_argument("--format", choices=("auto", "json", "csv", "xml"), default="auto")
+    xref.add_argument("--limit", type=int, default=50, help="maximum problems to list")
+    xref.set_defaults(func=cmd_xref)
+
+    ids = commands.add_parser("ids", help="find UniqID collisions and allocate free UniqIDs in a library")
+    ids.add_argument("library", help="quest library directory")
+    ids.add_argument("--range", help="UniqID range, e.g. 3000-3999 (stored in the library)")
+    ids.add_argument("--allocate", type=int, default=0, help="reserve this many free UniqIDs")
+    ids.add_argument("--limit", type=int, default=50)
+    ids.set_defaults(func=cmd_ids)
+
+    imp = commands.add_parser("import", help="import a directory of quest XML and report problems")
+    imp.add_argument("directory")
+    imp.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    imp.add_argument("--json", help="also write the imported quests to this JSON file")
+    imp.add_argument("--limit", type=int, default=50, help="maximum problems to list")
+    imp.set_defaults(func=cmd_import)
+
+    validate = commands.add_parser("validate", help="check quest sources without writing")
+    validate.add_argument("sources", nargs="+")
+    validate.add_argument("--format", choices=("auto", "json", "csv", "xml"), default="auto")
+    validate.add_argument("--jobs", type=int, default=1)
+    validate.add_argument("--limit", type=int, default=50)
+    validate.add_argument("--strict", action="store_true", help="fail on row rule warnings too")
+    validate.set_defaults(func=cmd_validate)
+
+    return parser
+
+
+# Commands the GUI entry point hands over to this module
+COMMANDS = ("generate", "sheets", "watch", "delta", "pack", "unpack", "strings", "serve", "xref", "ids", "import", "validate")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""UniqID collision detection and free-ID allocation over the library index
+
+Both work from the SQLite library index (see quest_library), so neither
+re-reads the quest files: collisions are one GROUP BY query, and the
+allocator loads the used IDs of its range once into an interval set.
+IDs it hands out are reserved in the index until a quest with that ID is
+indexed, so the GUI and batch runs never hand out the same ID twice.
+"""
+from bisect import bisect_right
+
+# Settings key of the configured allocation range in the library index
+ID_RANGE_SETTING = "id_range"
+
+# UniqID values that ask batch generation to allocate an ID
+AUTO_IDS = ("", "auto")
+
+
+def parse_id_range(text):
+    """(low, high) from "3000-3999" """
+    try:
+        low, high = (int(part) for part in text.split("-", 1))
+    except ValueError:
+        raise ValueError(f"ID range must look like 3000-3999, got {text!r}")
+    if low > high:
+        raise ValueError(f"ID range {text!r} is empty")
+    return low, high
+
+
+class IntervalSet:
+    """Disjoint, sorted inclusive integer intervals"""
+
+    def __init__(self, values=()):
+        self.starts = []
+        self.ends = []
+        for value in values:
+            self.add(value)
+
+    def __len__(self):
+        """Number of intervals (not of values)"""
+        return len(self.starts)
+
+    def __contains__(self, value):
+        i = bisect_right(self.starts, value) - 1
+        return i >= 0 and value <= self.ends[i]
+
+    def add(self, value):
+        """Add one value, merging with neighbouring intervals"""
+        i = bisect_right(self.starts, value) - 1
+        if i >= 0 and value <= self.ends[i]:
+            return
+        joins_left = i >= 0 and self.ends[i] == value - 1
+        joins_right = i + 1 < len(self.starts) and self.starts[i + 1] == value + 1
+        if joins_left and joins_right:
+            self.ends[i] = self.ends.pop(i + 1)
+            del self.starts[i + 1]
+        elif joins_left:
+            self.ends[i] = value
+        elif joins_right:
+            self.starts[i + 1] = value
+        else:
+            self.starts.insert(i + 1, value)
+            self.ends.insert(i + 1, value)
+
+    def first_gap(self, low, high):
+        """Smallest value in [low, high] not in the set, or None"""
+        candidate = low
+        i = bisect_right(self.starts, candidate) - 1
+        if i >= 0 and candidate <= self.ends[i]:
+            candidate = self.ends[i] + 1
+        return candidate if candidate <= high else None
+
+    def intervals(self):
+        return list(zip(self.starts, self.ends))
+
+
+class IdAllocator:
+    """Hands out free UniqIDs from a range, backed by a QuestLibraryIndex"""
+
+    def __init__(self, index, low, high):
+        self.index = index
+        self.low = low
+        self.high = high
+        self.used = IntervalSet()
+        # used_ids() is sorted, so every add appends or extends the last interval
+        for uniq_id in index.used_ids(low, high):
+            self.used.add(uniq_id)
+
+    @classmethod
+    def from_index(cls, index, id_range=None):
+        """Allocator for id_range ("low-high"), else the range stored in the index
+
+        A given range is stored as the library's default.
+        """
+        if id_range:
+            index.set_setting(ID_RANGE_SETTING, id_range)
+        else:
+            id_range = index.get_setting(ID_RANGE_SETTING)
+            if not id_range:
+                raise ValueError("No UniqID range configured for this library")
+        return cls(index, *parse_id_range(id_range))
+
+    def next_free(self):
+        """Smallest free ID in the range without reserving it, or None"""
+        return self.used.first_gap(self.low, self.high)
+
+    def free_count(self):
+        covered = sum(min(end, self.high) - max(start, self.low) + 1
+                      for start, end in self.used.intervals())
+        return self.high - self.low + 1 - covered
+
+    def allocate(self, count=1):
+        """Reserve and return count free IDs (ValueError if the range runs out)"""
+        allocated = []
+        for _ in range(count):
+            uniq_id = self.next_free()
+            if uniq_id is None:
+                raise ValueError(f"No free UniqID left in {self.low}-{self.high}")
+            self.used.add(uniq_id)
+            allocated.append(uniq_id)
+        self.index.reserve_ids(allocated)
+        return allocated
+
+
+def assign_ids(quests, allocator):
+    """Give quests whose UniqID is empty or "auto" a freshly allocated ID; return them"""
+    pending = [quest for quest in quests if quest.UniqID.strip().lower() in AUTO_IDS]
+    for quest, uniq_id in zip(pending, allocator.allocate(len(pending)) if pending else ()):
+        quest.set_field("UniqID", str(uniq_id))
+    return pending
+
+
+def find_collisions(quests, index=None):
+    """(UniqID, description) for IDs used twice in quests, or already used in the library
+
+    A library quest whose file has the quest's own file name is the same
+    quest being regenerated, not a collision.
+    """
+    collisions = []
+    seen = {}
+    for quest in quests:
+        if quest.UniqID in seen:
+            collisions.append((quest.UniqID, f"used by {seen[quest.UniqID]} and {quest.file_name()}"))
+        else:
+            seen[quest.UniqID] = quest.file_name()
+        if index is not None:
+            others = [row["path"] for row in index.find(quest.UniqID)
+                      if row["path"].rsplit("/", 1)[-1] != quest.file_name()]
+            if others:
+                collisions.append((quest.UniqID, f"{quest.file_name()} collides with library {', '.join(others)}"))
+    return collisions
@@ -0,0 +1,315 @@
+"""Quest library: a directory of quest XML files and its persistent index"""
+import os
+import sqlite3
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from quest_strings import intern_quest_text
+from quest_xml import iter_quest_elements, iter_parsed_quests, load_quest, parse_quest_element, check_quest_structure
+
+# Default index file name, stored inside the library directory
+INDEX_FILE_NAME = ".quest_index.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS quests (
+    path TEXT NOT NULL REFERENCES files(path) ON DELETE CASCADE,
+    quest_index INTEGER NOT NULL,
+    uniq_id INTEGER,
+    level INTEGER,
+    type INTEGER,
+    title_tab TEXT,
+    title_text TEXT,
+    goal_ids TEXT,
+    reward_items TEXT,
+    PRIMARY KEY (path, quest_index)
+);
+CREATE INDEX IF NOT EXISTS quests_uniq_id ON quests(uniq_id);
+CREATE TABLE IF NOT EXISTS reserved_ids (
+    uniq_id INTEGER PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def iter_xml_files(directory):
+    """Yield (relative_path, stat) for every .xml file below directory"""
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(".xml") and entry.is_file():
+                    relative = os.path.relpath(entry.path, directory).replace(os.sep, "/")
+                    yield relative, entry.stat()
+
+
+def _text(elem, path):
+    child = elem.find(path)
+    return (child.text or "").strip() if child is not None else ""
+
+
+def summarize_quest_element(elem):
+    """Index columns for one QuestInfo element, read straight from the XML"""
+    goal_ids = [_text(goal, "GoalId") for goal in elem.iterfind("QuestGoals/QuestGoal")]
+    reward_items = [_text(item, "RewardItem")
+                    for item in elem.iterfind("RewardQuantities/RewardQuantity/QuestRewardItems/QuestRewardItemsItem")]
+    return {
+        "uniq_id": _text(elem, "UniqID"),
+        "level": _text(elem, "Level"),
+        "type": _text(elem, "Type"),
+        "title_tab": _text(elem, "TitleTab"),
+        "title_text": _text(elem, "TitleText"),
+        "goal_ids": " ".join(goal_id for goal_id in goal_ids if goal_id),
+        "reward_items": " ".join(item for item in reward_items if item),
+    }
+
+
+def summarize_quest_file(file_path):
+    """Index rows for every quest in a file"""
+    return [summarize_quest_element(elem) for elem in iter_quest_elements(file_path)]
+
+
+class QuestLibraryIndex:
+    """Persistent SQLite index of the quests found in a library directory
+
+    scan() only re-parses files whose mtime or size changed since the last
+    run, so repeated scans of a large library are cheap and lookups by
+    UniqID never touch the XML files.
+    """
+
+    def __init__(self, directory, db_path=None):
+        self.directory = os.path.abspath(directory)
+        self.db_path = db_path or os.path.join(self.directory, INDEX_FILE_NAME)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def absolute_path(self, path):
+        """Absolute file path for an indexed (library-relative) path"""
+        return os.path.join(self.directory, *path.split("/"))
+
+    def scan(self, progress=None):
+        """Bring the index up to date with the directory
+
+        Returns a dict with counts of scanned, updated and removed files and
+        a list of (path, error) for files that could not be parsed. Files
+        that failed are remembered and retried only when they change.
+        """
+        known = {row["path"]: (row["mtime_ns"], row["size"], row["error"])
+                 for row in self.conn.execute("SELECT path, mtime_ns, size, error FROM files")}
+        stats = {"scanned": 0, "updated": 0, "removed": 0, "errors": []}
+        seen = set()
+
+        with self.conn:
+            for path, st in iter_xml_files(self.directory):
+                seen.add(path)
+                stats["scanned"] += 1
+                previous = known.get(path)
+                if previous and previous[:2] == (st.st_mtime_ns, st.st_size):
+                    if previous[2]:
+                        stats["errors"].append((path, previous[2]))
+                    continue
+
+                self.index_file(path, st)
+                stats["updated"] += 1
+                error = self.conn.execute("SELECT error FROM files WHERE path = ?", (path,)).fetchone()[0]
+                if error:
+                    stats["errors"].append((path, error))
+                if progress:
+                    progress(stats)
+
+            removed = [path for path in known if path not in seen]
+            self.conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+            stats["removed"] = len(removed)
+            # Reservations end once a quest with that ID has been saved
+            self.conn.execute("DELETE FROM reserved_ids WHERE uniq_id IN (SELECT uniq_id FROM quests)")
+
+        return stats
+
+    def index_file(self, path, st=None):
+        """(Re)index a single library-relative file path"""
+        if st is None:
+            st = os.stat(self.absolute_path(path))
+        try:
+            summaries = summarize_quest_file(self.absolute_path(path))
+            error = None
+        except (ET.ParseError, OSError, UnicodeDecodeError) as e:
+            summaries = []
+            error = str(e)
+
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+        self.conn.execute("INSERT INTO files (path, mtime_ns, size, error) VALUES (?, ?, ?, ?)",
+                          (path, st.st_mtime_ns, st.st_size, error))
+        self.conn.executemany(
+            "INSERT INTO quests (path, quest_index, uniq_id, level, type, title_tab, title_text, goal_ids, reward_items)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(path, index, s["uniq_id"], s["level"], s["type"], s["title_tab"], s["title_text"],
+              s["goal_ids"], s["reward_items"]) for index, s in enumerate(summaries)])
+
+    def find(self, uniq_id):
+        """Index rows for a UniqID (more than one means a collision)"""
+        return self.conn.execute(
+            "SELECT * FROM quests WHERE uniq_id = ? ORDER BY path, quest_index", (uniq_id,)).fetchall()
+
+    def search(self, text):
+        """Index rows whose TitleTab or TitleText contains text"""
+        pattern = f"%{text}%"
+        return self.conn.execute(
+            "SELECT * FROM quests WHERE title_tab LIKE ? OR title_text LIKE ? ORDER BY uniq_id",
+            (pattern, pattern)).fetchall()
+
+    def quests(self):
+        """All index rows ordered by UniqID"""
+        return self.conn.execute("SELECT * FROM quests ORDER BY uniq_id, path, quest_index").fetchall()
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM quests").fetchone()[0]
+
+    def collisions(self):
+        """{UniqID: index rows} for every UniqID used by more than one quest, in one query"""
+        grouped = {}
+        for row in self.conn.execute(
+                "SELECT * FROM quests WHERE uniq_id IN "
+                "(SELECT uniq_id FROM quests GROUP BY uniq_id HAVING COUNT(*) > 1) "
+                "ORDER BY uniq_id, path, quest_index"):
+            grouped.setdefault(str(row["uniq_id"]), []).append(row)
+        return grouped
+
+    def used_ids(self, low, high):
+        """Sorted distinct numeric UniqIDs in [low, high], indexed or reserved"""
+        return [row[0] for row in self.conn.execute(
+            "SELECT uniq_id FROM quests WHERE typeof(uniq_id) = 'integer' AND uniq_id BETWEEN ?1 AND ?2 "
+            "UNION SELECT uniq_id FROM reserved_ids WHERE uniq_id BETWEEN ?1 AND ?2 ORDER BY 1",
+            (low, high))]
+
+    def reserve_ids(self, uniq_ids):
+        """Record IDs handed out but not saved yet, so no other session reuses them"""
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO reserved_ids (uniq_id) VALUES (?)",
+                                  [(uniq_id,) for uniq_id in uniq_ids])
+
+    def get_setting(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_setting(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+
+    def load(self, uniq_id, quest=None):
+        """Load the quest model for a UniqID, or None if it is not indexed"""
+        rows = self.find(uniq_id)
+        if not rows:
+            return None
+        row = rows[0]
+        return load_quest(self.absolute_path(row["path"]), index=row["quest_index"], quest=quest)
+
+
+@dataclass(slots=True)
+class FileImportResult:
+    """Outcome of importing one file: its quests and any problems found"""
+    path: str
+    quests: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+
+def _parse_checked(index, elem, spans):
+    """(index, quest, problems) for one streamed QuestInfo element"""
+    errors = []
+    quest = parse_quest_element(elem, errors=errors, spans=spans)
+    errors.extend(check_quest_structure(elem))
+    return index, quest, errors
+
+
+def import_quest_file(file_path):
+    """Parse every quest in a file, collecting problems instead of stopping
+
+    Invalid integers are reported with their location and read as 0;
+    missing elements and count mismatches are reported per quest; a
+    malformed file yields a single error. Runs in pool workers.
+    """
+    result = FileImportResult(file_path)
+    try:
+        for index, quest, errors in iter_parsed_quests(file_path, _parse_checked):
+            result.quests.append(quest)
+            result.errors.extend(f"quest #{index} (UniqID {quest.UniqID}): {error}" for error in errors)
+    except ET.ParseError as e:
+        result.errors.append(f"malformed XML: {e}")
+    except (OSError, UnicodeDecodeError) as e:
+        result.errors.append(f"unreadable file: {e}")
+    return result
+
+
+class ImportReport:
+    """Aggregated results of a directory import"""
+
+    def __init__(self, directory, results):
+        self.directory = directory
+        self.results = results
+
+    @property
+    def quests(self):
+        return [quest for result in self.results for quest in result.quests]
+
+    @property
+    def failed(self):
+        """Results that reported at least one problem"""
+        return [result for result in self.results if result.errors]
+
+    def error_count(self):
+        return sum(len(result.errors) for result in self.results)
+
+    def format(self, limit=50):
+        """Human-readable summary, listing up to limit problems"""
+        lines = [
+            f"Imported {sum(len(r.quests) for r in self.results)} quests from {len(self.results)} files in {self.directory}",
+            f"Files with problems: {len(self.failed)} ({self.error_count()} problems)"
+        ]
+        shown = 0
+        for result in self.failed:
+            for error in result.errors:
+                if shown == limit:
+                    lines.append(f"... and {self.error_count() - limit} more")
+                    return "\n".join(lines)
+                lines.append(f"  {os.path.relpath(result.path, self.directory)}: {error}")
+                shown += 1
+        return "\n".join(lines)
+
+
+def import_directory(directory, jobs=None, chunksize=64):
+    """Import every quest XML file below directory across a process pool
+
+    jobs is the worker count (default: CPU count); jobs=1 parses serially
+    in this process. Results come back in sorted path order, with repeated
+    text values shared between quests.
+    """
+    paths = sorted(os.path.join(directory, *path.split("/")) for path, _ in iter_xml_files(directory))
+    if jobs == 1 or len(paths) < 2:
+        results = [import_quest_file(path) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(import_quest_file, paths, chunksize=chunksize))
+    intern_quest_text(quest for result in results for quest in result.quests)
+    return ImportReport(directory, results)
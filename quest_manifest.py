@@ -0,0 +1,181 @@
+"""Build manifest: content hashes per UniqID for incremental output and deltas
+
+Each build renders every quest, but a file is only rewritten when the hash
+of its canonical output differs from the manifest entry (or the file is
+missing). The manifest remembers in which build every quest was added or
+last changed, plus tombstones for removed quests, so a delta package of
+everything that changed since any earlier build can be cut without
+comparing directories.
+"""
+import hashlib
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from quest_xml import XML_FILE_HEADER, PRETTY_PROFILE, atomic_write, iter_quest_xml, write_quest_file
+
+# Manifest file name, stored inside the output directory
+MANIFEST_FILE_NAME = "quest_manifest.json"
+
+# Name of the change list inside a delta package
+DELTA_FILE_NAME = "delta.json"
+
+
+def quest_digest(quest, profile=PRETTY_PROFILE):
+    """SHA-256 of the quest's file output, hashed chunk by chunk"""
+    digest = hashlib.sha256()
+    for chunk in iter_quest_xml(quest, XML_FILE_HEADER, profile):
+        digest.update(chunk.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _build_one(args):
+    """Pool worker: hash a quest and rewrite its file only if the hash changed"""
+    quest, file_path, old_hash, profile = args
+    new_hash = quest_digest(quest, profile)
+    if new_hash == old_hash and os.path.exists(file_path):
+        return new_hash, False
+    write_quest_file(quest, file_path, profile)
+    return new_hash, True
+
+
+class BuildManifest:
+    """Per-UniqID file names and content hashes of an output directory
+
+    entries maps UniqID -> {"file", "hash", "added", "changed"} where added
+    and changed are build numbers; removed maps UniqID -> {"file", "build"}.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_FILE_NAME)
+        self.build = 0
+        self.entries = {}
+        self.removed = {}
+        self.builds = []
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.build = data.get("build", 0)
+            self.entries = data.get("quests", {})
+            self.removed = data.get("removed", {})
+            self.builds = data.get("builds", [])
+
+    def save(self):
+        data = {"build": self.build, "builds": self.builds, "quests": self.entries, "removed": self.removed}
+        with atomic_write(self.path) as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+
+    def update(self, quests, jobs=1, chunksize=32, profile=PRETTY_PROFILE):
+        """Run a build: write added/changed quests, delete removed ones
+
+        quests is the complete set for this build (UniqIDs must be unique);
+        quests missing from it are treated as removed. Hashes cover the
+        written bytes, so switching profile rewrites every file. Returns a
+        dict of added, changed, removed and unchanged UniqID lists.
+        """
+        by_id = self._by_id(quests)
+        removed = [uniq_id for uniq_id in self.entries if uniq_id not in by_id]
+        return self._build(by_id, removed, jobs, chunksize, profile)
+
+    def apply(self, quests, removed=(), jobs=1, chunksize=32, profile=PRETTY_PROFILE):
+        """Run a partial build: only the given quests and removed UniqIDs
+
+        Every other entry is left alone without being rendered, so the cost
+        follows the size of the change. Returns the same dict as update().
+        """
+        by_id = self._by_id(quests)
+        removed = [uniq_id for uniq_id in removed if uniq_id in self.entries and uniq_id not in by_id]
+        return self._build(by_id, removed, jobs, chunksize, profile)
+
+    @staticmethod
+    def _by_id(quests):
+        by_id = {}
+        for quest in quests:
+            if quest.UniqID in by_id:
+                raise ValueError(f"Duplicate UniqID {quest.UniqID} in build input")
+            by_id[quest.UniqID] = quest
+        return by_id
+
+    def _build(self, by_id, removed, jobs, chunksize, profile):
+        os.makedirs(self.directory, exist_ok=True)
+        build = self.build + 1
+        tasks = []
+        for uniq_id, quest in by_id.items():
+            entry = self.entries.get(uniq_id)
+            # A renamed file must be rewritten under its new name
+            old_hash = entry["hash"] if entry and entry["file"] == quest.file_name() else None
+            tasks.append((quest, os.path.join(self.directory, quest.file_name()), old_hash, profile))
+
+        if jobs == 1 or len(tasks) < 2:
+            outcomes = [_build_one(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                outcomes = list(executor.map(_build_one, tasks, chunksize=chunksize))
+
+        result = {"added": [], "changed": [], "removed": [], "unchanged": []}
+        stale_files = []
+        for (quest, file_path, _, _), (new_hash, written) in zip(tasks, outcomes):
+            uniq_id = quest.UniqID
+            entry = self.entries.get(uniq_id)
+            name = os.path.basename(file_path)
+            if entry is None:
+                self.entries[uniq_id] = {"file": name, "hash": new_hash, "added": build, "changed": build}
+                self.removed.pop(uniq_id, None)
+                result["added"].append(uniq_id)
+            elif entry["hash"] != new_hash or entry["file"] != name:
+                if entry["file"] != name:
+                    stale_files.append(entry["file"])
+                entry.update(file=name, hash=new_hash, changed=build)
+                result["changed"].append(uniq_id)
+            else:
+                result["unchanged"].append(uniq_id)
+
+        for uniq_id in removed:
+            entry = self.entries.pop(uniq_id)
+            stale_files.append(entry["file"])
+            self.removed[uniq_id] = {"file": entry["file"], "build": build}
+            result["removed"].append(uniq_id)
+
+        # Another quest may have taken over a stale name in this build
+        in_use = {entry["file"] for entry in self.entries.values()}
+        for name in stale_files:
+            if name not in in_use:
+                self._remove_file(name)
+
+        self.build = build
+        self.builds.append({"build": build, "time": int(time.time()),
+                            **{key: len(value) for key, value in result.items()}})
+        self.save()
+        return result
+
+    def _remove_file(self, name):
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def changes_since(self, build):
+        """Added, changed and removed UniqIDs after the given build number"""
+        added = sorted(uid for uid, entry in self.entries.items() if entry["added"] > build)
+        changed = sorted(uid for uid, entry in self.entries.items()
+                         if entry["added"] <= build < entry["changed"])
+        removed = sorted(uid for uid, entry in self.removed.items() if entry["build"] > build)
+        return {"since": build, "build": self.build, "added": added, "changed": changed, "removed": removed}
+
+    def write_delta(self, build, package_path):
+        """Zip the files added or changed since build plus a delta.json change list
+
+        Returns the change list written into the package.
+        """
+        delta = self.changes_since(build)
+        delta["files"] = {uid: self.entries[uid]["file"] for uid in delta["added"] + delta["changed"]}
+        delta["removed_files"] = {uid: self.removed[uid]["file"] for uid in delta["removed"]}
+        with atomic_write(package_path, binary=True) as f:
+            with zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED) as package:
+                for name in delta["files"].values():
+                    package.write(os.path.join(self.directory, name), name)
+                package.writestr(DELTA_FILE_NAME, json.dumps(delta, indent=1, sort_keys=True))
+        return delta
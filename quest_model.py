@@ -0,0 +1,273 @@
+"""Headless quest model shared by the GUI and batch tooling.
+
+Nothing in this module touches Tk, so quests can be built, imported and
+generated without a display.
+"""
+from dataclasses import dataclass, field, fields, replace
+
+
+# Basic fields in XML order with their default values
+BASIC_FIELDS = (
+    ("UniqID", "2886"), ("Model", "0"), ("Model2", "0"), ("Level", "30"),
+    ("Pos", "5"), ("Pos2", "0"), ("ManagedID", "0"), ("Active", "1"),
+    ("Unknown", "0"), ("Immediate", "0"), ("ResetQuest", "0"), ("Type", "1"),
+    ("StartTargetType", "0"), ("StartTargetID", "93610"), ("Target", "1"), ("TargetValue", "93613")
+)
+
+# Text fields in XML order with their default values
+TEXT_FIELDS = (
+    ("TitleTab", "Silver Lake"), ("TitleText", "View from the Top"),
+    ("Body", "You haven't been explore to the whole area yet, have you? If you go farther to the right, you will see a high ground.\n\nTalk to the Terriermon there, and he'll show you how to get to the top where you will be able to look down at the whole region."),
+    ("Simple", ""), ("Helper", "Speak with Terriermon"), ("Process", "Go on, then. Fly away like me!"),
+    ("Complete", "There's nothing like the view from the top! If you have to get to a higher ground, you have come to the right Digimon!"),
+    ("Expert", "")
+)
+
+BASIC_FIELD_NAMES = tuple(name for name, _ in BASIC_FIELDS)
+TEXT_FIELD_NAMES = tuple(name for name, _ in TEXT_FIELDS)
+QUEST_FIELD_NAMES = BASIC_FIELD_NAMES + TEXT_FIELD_NAMES
+
+
+@dataclass(slots=True)
+class QuestRow:
+    """Base of the integer row records (conditions, goals, rewards)"""
+    # Source XML kept verbatim for parts of the row the model does not
+    # hold; only the XML parser sets it (see quest_xml), so it is None for
+    # rows built from values and never read from or written to dicts
+    passthrough: dict = field(default=None, kw_only=True, repr=False)
+
+    @classmethod
+    def field_names(cls):
+        """Return the row's field names in XML/treeview column order"""
+        return tuple(f.name for f in fields(cls) if f.name != "passthrough")
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a row from a field->value mapping, ignoring unknown keys"""
+        return cls(**{name: int(data.get(name, 0) or 0) for name in cls.field_names()})
+
+    def to_dict(self):
+        """Return the row as a field->value dict"""
+        return {name: getattr(self, name) for name in self.field_names()}
+
+    def values(self):
+        """Return the row values in column order"""
+        # Slotted dataclasses list their own fields in __slots__, in order
+        # (passthrough lives in the base's slots); this avoids the deepcopy
+        # done by dataclasses.astuple
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+
+@dataclass(slots=True)
+class QuestCondition(QuestRow):
+    ConditionType: int = 0
+    ConditionId: int = 0
+    ConditionCount: int = 0
+
+
+@dataclass(slots=True)
+class QuestGoal(QuestRow):
+    GoalType: int = 0
+    GoalId: int = 0
+    GoalCount: int = 0
+    goalAmount: int = 0
+    CurTypeCount: int = 0
+    SubValue: int = 0
+    SubValue1: int = 0
+
+
+@dataclass(slots=True)
+class RewardQuantity(QuestRow):
+    Reward: int = 0
+    RewardType: int = 0
+    RewardMoney: int = 0
+    RewardItem: int = 0
+    RewardAmount: int = 0
+
+
+@dataclass(slots=True)
+class QuestInfo:
+    """A single quest: basic fields, text fields and its row sections"""
+    UniqID: str = "2886"
+    Model: str = "0"
+    Model2: str = "0"
+    Level: str = "30"
+    Pos: str = "5"
+    Pos2: str = "0"
+    ManagedID: str = "0"
+    Active: str = "1"
+    Unknown: str = "0"
+    Immediate: str = "0"
+    ResetQuest: str = "0"
+    Type: str = "1"
+    StartTargetType: str = "0"
+    StartTargetID: str = "93610"
+    Target: str = "1"
+    TargetValue: str = "93613"
+    TitleTab: str = TEXT_FIELDS[0][1]
+    TitleText: str = TEXT_FIELDS[1][1]
+    Body: str = TEXT_FIELDS[2][1]
+    Simple: str = TEXT_FIELDS[3][1]
+    Helper: str = TEXT_FIELDS[4][1]
+    Process: str = TEXT_FIELDS[5][1]
+    Complete: str = TEXT_FIELDS[6][1]
+    Expert: str = TEXT_FIELDS[7][1]
+    conditions: list = field(default_factory=list)
+    goals: list = field(default_factory=list)
+    rewards: list = field(default_factory=list)
+    # Source XML kept verbatim for elements the model does not hold
+    # (QuestItems, Event, unknown elements); like the rows' passthrough,
+    # only the XML parser sets it and from_dict/to_dict leave it out
+    passthrough: dict = field(default_factory=dict, repr=False)
+    # Bumped on every field or row change; used to key rendered-XML caches
+    version: int = field(default=0, compare=False, repr=False)
+
+    def touch(self):
+        """Record a mutation (call after changing rows in place)"""
+        self.version += 1
+
+    def snapshot(self):
+        """Return a copy that later edits to this quest will not affect
+
+        Row lists are copied; the rows themselves are shared, since the GUI
+        replaces rows rather than mutating them.
+        """
+        copy = replace(self, conditions=list(self.conditions), goals=list(self.goals),
+                       rewards=list(self.rewards))
+        return copy
+
+    def row_count(self):
+        """Total number of condition, goal and reward rows"""
+        return len(self.conditions) + len(self.goals) + len(self.rewards)
+
+    def has_passthrough(self):
+        """True if the quest or any row keeps source XML that to_dict leaves out"""
+        return bool(self.passthrough) or any(row.passthrough for section in ROW_TYPES
+                                             for row in getattr(self, section))
+
+    # Batch row operations: each changes the model (and its version) once
+    def section_rows(self, section):
+        """Row list for a section: conditions, goals or rewards"""
+        if section not in ROW_TYPES:
+            raise KeyError(f"Unknown quest section: {section}")
+        return getattr(self, section)
+
+    def insert_rows(self, section, rows, index=None):
+        """Insert rows at index (default: append); return their new indices"""
+        current = self.section_rows(section)
+        index = len(current) if index is None else max(0, min(index, len(current)))
+        current[index:index] = rows
+        self.touch()
+        return list(range(index, index + len(rows)))
+
+    def delete_rows(self, section, indices):
+        """Delete the rows at the given indices; return how many were removed"""
+        current = self.section_rows(section)
+        doomed = {index for index in indices if 0 <= index < len(current)}
+        if doomed:
+            setattr(self, section, [row for index, row in enumerate(current) if index not in doomed])
+            self.touch()
+        return len(doomed)
+
+    def duplicate_rows(self, section, indices):
+        """Insert copies of the given rows after the last of them; return the copies' indices"""
+        current = self.section_rows(section)
+        picked = sorted(index for index in set(indices) if 0 <= index < len(current))
+        if not picked:
+            return []
+        return self.insert_rows(section, [replace(current[index]) for index in picked], picked[-1] + 1)
+
+    def set_column(self, section, indices, field_name, value):
+        """Set one field to value on the given rows; return how many changed
+
+        Each row keeps the passthrough that still fits its layout, as in the
+        row editor (RowSection.carried_passthrough).
+        """
+        # quest_schema is built on this module's row classes
+        from quest_schema import QUEST_SECTIONS
+        current = self.section_rows(section)
+        if field_name not in ROW_TYPES[section].field_names():
+            raise KeyError(f"Unknown {section} field: {field_name}")
+        changed = 0
+        for index in set(indices):
+            if 0 <= index < len(current) and getattr(current[index], field_name) != value:
+                old = current[index]
+                current[index] = replace(old, **{field_name: value})
+                current[index].passthrough = QUEST_SECTIONS[section].carried_passthrough(old, current[index])
+                changed += 1
+        if changed:
+            self.touch()
+        return changed
+
+    def get_field(self, name):
+        """Get a basic/text field value, or "" for unknown names"""
+        if name not in QUEST_FIELD_NAMES:
+            return ""
+        return getattr(self, name)
+
+    def set_field(self, name, value):
+        """Set a basic/text field value (stored stripped, like the form reads it)"""
+        if name not in QUEST_FIELD_NAMES:
+            raise KeyError(f"Unknown quest field: {name}")
+        value = (value or "").strip()
+        if getattr(self, name) != value:
+            setattr(self, name, value)
+            self.version += 1
+
+    def reset_fields(self):
+        """Reset all basic and text fields to their defaults"""
+        for name, default in BASIC_FIELDS + TEXT_FIELDS:
+            setattr(self, name, default)
+        self.version += 1
+
+    def filled_field_count(self):
+        """Count basic/text fields that have a non-empty value"""
+        return sum(1 for name in QUEST_FIELD_NAMES if getattr(self, name).strip())
+
+    def file_name(self):
+        """Default file name used when saving this quest"""
+        title = self.TitleTab.replace(" ", "_").replace("/", "_").replace("\\", "_")
+        return f"Quest_{self.UniqID}_{title}.xml"
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a quest from a plain dict (e.g. decoded JSON)"""
+        quest = cls()
+        for name in QUEST_FIELD_NAMES:
+            if name in data and data[name] is not None:
+                quest.set_field(name, str(data[name]))
+        quest.conditions = [QuestCondition.from_dict(row) for row in data.get("conditions", ())]
+        quest.goals = [QuestGoal.from_dict(row) for row in data.get("goals", ())]
+        quest.rewards = [RewardQuantity.from_dict(row) for row in data.get("rewards", ())]
+        quest.touch()
+        return quest
+
+    def to_dict(self):
+        """Return the quest as a plain, JSON-serializable dict"""
+        data = {name: getattr(self, name) for name in QUEST_FIELD_NAMES}
+        data["conditions"] = [row.to_dict() for row in self.conditions]
+        data["goals"] = [row.to_dict() for row in self.goals]
+        data["rewards"] = [row.to_dict() for row in self.rewards]
+        return data
+
+
+# Row type for each row section of a quest
+ROW_TYPES = {
+    "conditions": QuestCondition,
+    "goals": QuestGoal,
+    "rewards": RewardQuantity,
+}
+
+
+# Sample rows used by the "Sample" quick action
+def sample_conditions():
+    return [QuestCondition(1, 30, 0), QuestCondition(3, 44, 0)]
+
+
+def sample_goals():
+    return [QuestGoal(GoalType=4, GoalId=93609, goalAmount=1)]
+
+
+def sample_rewards():
+    return [RewardQuantity(RewardType=0, RewardMoney=800),
+            RewardQuantity(RewardType=1, RewardItem=400000)]
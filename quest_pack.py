@@ -0,0 +1,236 @@
+"""Binary quest pack: a compiled, memory-mappable form of a quest library
+
+Layout (little-endian):
+
+    header    magic "QPAK", format version, quest count, and the offsets
+              of the string table and the index
+    records   one per quest: the basic fields as int32, the text fields as
+              string table ids, the three row counts, the string table id
+              of the quest's passthrough XML as JSON ("" when it has none;
+              not in version 1 packs), then the condition, goal and reward
+              rows as int32 columns
+    strings   offsets (count + 1 uint32) into a blob of UTF-8 text; every
+              distinct text value is stored once
+    index     (UniqID, record offset) pairs sorted by UniqID
+
+QuestPack maps the file and binary-searches the index in place, so opening
+a pack costs one header read and a lookup touches only the pages of the
+records it returns.
+"""
+import json
+import mmap
+import struct
+
+from quest_batch import write_quests
+from quest_model import BASIC_FIELD_NAMES, TEXT_FIELD_NAMES, QuestInfo, QuestCondition, QuestGoal, RewardQuantity
+from quest_xml import PRETTY_PROFILE, atomic_write
+
+PACK_MAGIC = b"QPAK"
+PACK_VERSION = 2
+
+_HEADER = struct.Struct("<4sHHIQQI")
+# Record head by format version; version 2 adds the passthrough string id
+_RECORD_HEADS = {
+    1: struct.Struct(f"<{len(BASIC_FIELD_NAMES)}i{len(TEXT_FIELD_NAMES)}I3I"),
+    2: struct.Struct(f"<{len(BASIC_FIELD_NAMES)}i{len(TEXT_FIELD_NAMES)}I3II"),
+}
+_RECORD_HEAD = _RECORD_HEADS[PACK_VERSION]
+_INDEX_ENTRY = struct.Struct("<iQ")
+_ROW_TYPES = (QuestCondition, QuestGoal, RewardQuantity)
+_ROW_WIDTHS = tuple(len(row_class.field_names()) for row_class in _ROW_TYPES)
+
+
+def _basic_int(quest, name):
+    """Basic field as an int, refusing values that would not round-trip"""
+    value = getattr(quest, name)
+    try:
+        number = int(value)
+    except ValueError:
+        number = None
+    if number is None or str(number) != value or not -2**31 <= number < 2**31:
+        raise ValueError(f"Quest {quest.UniqID}: {name} {value!r} is not a 32-bit integer")
+    return number
+
+
+def _passthrough_json(quest, sections):
+    """Passthrough XML of a quest and its rows as JSON, or "" when there is none"""
+    rows = [[section, position, row.passthrough]
+            for section, section_rows in enumerate(sections)
+            for position, row in enumerate(section_rows) if row.passthrough]
+    if not quest.passthrough and not rows:
+        return ""
+    return json.dumps({"quest": quest.passthrough, "rows": rows}, ensure_ascii=False, separators=(",", ":"))
+
+
+def _pack_record(quest, string_id):
+    """Encode one quest record"""
+    head = [_basic_int(quest, name) for name in BASIC_FIELD_NAMES]
+    head += [string_id(getattr(quest, name)) for name in TEXT_FIELD_NAMES]
+    sections = (quest.conditions, quest.goals, quest.rewards)
+    head += [len(rows) for rows in sections]
+    head.append(string_id(_passthrough_json(quest, sections)))
+
+    values = [value for rows in sections for row in rows for value in row.values()]
+    try:
+        return _RECORD_HEAD.pack(*head) + struct.pack(f"<{len(values)}i", *values)
+    except struct.error:
+        raise ValueError(f"Quest {quest.UniqID}: a row value is not a 32-bit integer")
+
+
+def write_quest_pack(quests, pack_path):
+    """Compile quests into a pack file (atomically); return the quest count
+
+    Basic fields must be canonical 32-bit integers, since the pack stores
+    them as numbers; anything else raises ValueError rather than changing
+    the quest on the way back to XML.
+    """
+    strings = {}
+
+    def string_id(text):
+        if text not in strings:
+            strings[text] = len(strings)
+        return strings[text]
+
+    index = []
+    with atomic_write(pack_path, binary=True) as f:
+        f.write(b"\0" * _HEADER.size)
+        offset = _HEADER.size
+        for quest in quests:
+            record = _pack_record(quest, string_id)
+            index.append((_basic_int(quest, "UniqID"), offset))
+            f.write(record)
+            offset += len(record)
+
+        strings_offset = offset
+        blobs = [text.encode("utf-8") for text in strings]
+        offsets = [0]
+        for blob in blobs:
+            offsets.append(offsets[-1] + len(blob))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.writelines(blobs)
+        offset += 4 * len(offsets) + offsets[-1]
+
+        index.sort()
+        f.writelines(_INDEX_ENTRY.pack(*entry) for entry in index)
+
+        f.seek(0)
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, len(index), offset, strings_offset, len(strings)))
+    return len(index)
+
+
+class QuestPack:
+    """Read-only, memory-mapped view of a quest pack"""
+
+    def __init__(self, pack_path):
+        with open(pack_path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, self.count, self.index_offset, self.strings_offset, self.string_count = \
+                _HEADER.unpack_from(self.data, 0)
+        except struct.error:
+            self.data.close()
+            raise ValueError(f"{pack_path} is not a quest pack")
+        if magic != PACK_MAGIC or version not in _RECORD_HEADS:
+            self.data.close()
+            raise ValueError(f"{pack_path} is not a version {' or '.join(map(str, _RECORD_HEADS))} quest pack")
+        self.record_head = _RECORD_HEADS[version]
+        self.text_offset = self.strings_offset + 4 * (self.string_count + 1)
+        self._strings = {}
+
+    def close(self):
+        self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _index_entry(self, position):
+        return _INDEX_ENTRY.unpack_from(self.data, self.index_offset + position * _INDEX_ENTRY.size)
+
+    def string(self, string_id):
+        """Text for a string table id (decoded once, then cached)"""
+        text = self._strings.get(string_id)
+        if text is None:
+            start, end = struct.unpack_from("<2I", self.data, self.strings_offset + 4 * string_id)
+            text = self._strings[string_id] = self.data[self.text_offset + start:self.text_offset + end].decode("utf-8")
+        return text
+
+    def uniq_ids(self):
+        """All UniqIDs in ascending order"""
+        return [self._index_entry(position)[0] for position in range(self.count)]
+
+    def _first_position(self, uniq_id):
+        """Binary search for the first index entry with UniqID >= uniq_id"""
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._index_entry(middle)[0] < uniq_id:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def record_offsets(self, uniq_id):
+        """Record offsets of every quest with this UniqID (several means a collision)"""
+        uniq_id = int(uniq_id)
+        offsets = []
+        position = self._first_position(uniq_id)
+        while position < self.count:
+            entry_id, offset = self._index_entry(position)
+            if entry_id != uniq_id:
+                break
+            offsets.append(offset)
+            position += 1
+        return offsets
+
+    def __contains__(self, uniq_id):
+        return bool(self.record_offsets(uniq_id))
+
+    def read_record(self, offset):
+        """Decode the quest record at a byte offset"""
+        head = self.record_head.unpack_from(self.data, offset)
+        basic_count, text_count = len(BASIC_FIELD_NAMES), len(TEXT_FIELD_NAMES)
+        counts = head[basic_count + text_count:basic_count + text_count + 3]
+        quest = QuestInfo()
+        for name, value in zip(BASIC_FIELD_NAMES, head[:basic_count]):
+            setattr(quest, name, str(value))
+        for name, string_id in zip(TEXT_FIELD_NAMES, head[basic_count:basic_count + text_count]):
+            setattr(quest, name, self.string(string_id))
+
+        offset += self.record_head.size
+        sections = []
+        for row_class, width, rows in zip(_ROW_TYPES, _ROW_WIDTHS, counts):
+            values = struct.unpack_from(f"<{rows * width}i", self.data, offset)
+            sections.append([row_class(*values[i:i + width]) for i in range(0, len(values), width)])
+            offset += 4 * len(values)
+        # Version 1 records end at the row counts
+        passthrough = self.string(head[-1]) if len(head) > basic_count + text_count + 3 else ""
+        if passthrough:
+            passthrough = json.loads(passthrough)
+            quest.passthrough = passthrough["quest"]
+            for section, position, row_passthrough in passthrough["rows"]:
+                sections[section][position].passthrough = row_passthrough
+        quest.conditions, quest.goals, quest.rewards = sections
+        quest.touch()
+        return quest
+
+    def get(self, uniq_id):
+        """The quest with this UniqID, or None"""
+        offsets = self.record_offsets(uniq_id)
+        return self.read_record(offsets[0]) if offsets else None
+
+    def __iter__(self):
+        """Quests in UniqID order"""
+        for position in range(self.count):
+            yield self.read_record(self._index_entry(position)[1])
+
+
+def unpack_quest_pack(pack_path, directory, jobs=1, profile=PRETTY_PROFILE):
+    """Write every quest in a pack back out as XML files; return the paths"""
+    with QuestPack(pack_path) as pack:
+        return write_quests(list(pack), directory, jobs=jobs, profile=profile)
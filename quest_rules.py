@@ -0,0 +1,134 @@
+"""Row validation rules for conditions, goals and rewards, evaluated library-wide
+
+Every rule is a predicate over a section's columns built only from
+comparisons, & and |, so the same expression evaluates a whole library at
+once on NumPy arrays or a single row on plain ints. With NumPy installed,
+validate_quests loads each section into int64 columns and runs every rule
+as one vectorized mask. Without it, the rules run row by row and give the
+same results.
+"""
+from dataclasses import dataclass
+from itertools import chain
+from operator import attrgetter
+
+from quest_model import ROW_TYPES
+
+try:
+    import numpy as np
+except ImportError:  # optional: only speeds up validate_quests
+    np = None
+
+
+# (section, code, message, predicate over the section's columns)
+RULES = (
+    ("rewards", "money-zero", "RewardType is 0 (Money) but RewardMoney is 0.",
+     lambda c: (c["RewardType"] == 0) & (c["RewardMoney"] == 0)),
+    ("rewards", "item-zero", "RewardType is for items but RewardItem is 0.",
+     lambda c: ((c["RewardType"] == 1) | (c["RewardType"] == 2)) & (c["RewardItem"] == 0)),
+    ("rewards", "unknown-type", "RewardType must be 0 (Money), 1 (Experience) or 2 (Item).",
+     lambda c: (c["RewardType"] < 0) | (c["RewardType"] > 2)),
+    ("rewards", "item-ignored", "RewardItem/RewardAmount are not written for money rewards.",
+     lambda c: (c["RewardType"] == 0) & ((c["RewardItem"] != 0) | (c["RewardAmount"] != 0))),
+    ("rewards", "money-ignored", "RewardMoney is not written for item rewards.",
+     lambda c: (c["RewardType"] != 0) & (c["RewardMoney"] != 0)),
+    ("rewards", "negative", "RewardMoney and RewardAmount must not be negative.",
+     lambda c: (c["RewardMoney"] < 0) | (c["RewardAmount"] < 0)),
+    ("goals", "goal-id-zero", "GoalId is 0.",
+     lambda c: c["GoalId"] == 0),
+    ("goals", "negative", "GoalCount and goalAmount must not be negative.",
+     lambda c: (c["GoalCount"] < 0) | (c["goalAmount"] < 0)),
+    ("conditions", "negative", "ConditionCount must not be negative.",
+     lambda c: c["ConditionCount"] < 0),
+)
+
+
+# Rules the row editor asks about on save; the rest only run in batch validation
+EDITOR_RULES = ("money-zero", "item-zero")
+
+
+@dataclass(slots=True)
+class RuleViolation:
+    quest: int          # position of the quest in the validated list
+    uniq_id: str
+    section: str
+    row: int            # row position within the quest's section
+    code: str
+    message: str
+
+    def __str__(self):
+        return f"UniqID {self.uniq_id}: {self.section[:-1]} #{self.row + 1}: {self.message}"
+
+
+def check_row(section, values, codes=None):
+    """Messages of the rules a single row (field -> int mapping) breaks
+
+    codes limits the check to the rules with those codes.
+    """
+    return [message for rule_section, code, message, predicate in RULES
+            if rule_section == section and (codes is None or code in codes) and predicate(values)]
+
+
+class SectionColumns:
+    """One section of many quests as int64 columns plus row -> quest maps"""
+
+    def __init__(self, quests, section):
+        names = ROW_TYPES[section].field_names()
+        sections = [getattr(quest, section) for quest in quests]
+        counts = np.fromiter(map(len, sections), dtype=np.int64, count=len(sections))
+        total = int(counts.sum())
+        # One attrgetter call per row and a single fromiter pass, no per-value Python loop
+        values = chain.from_iterable(map(attrgetter(*names), chain.from_iterable(sections)))
+        table = np.fromiter(values, dtype=np.int64, count=total * len(names)).reshape(total, len(names))
+        self.columns = {name: table[:, i] for i, name in enumerate(names)}
+        self.quest = np.repeat(np.arange(len(sections), dtype=np.int64), counts)
+        starts = np.cumsum(counts) - counts
+        self.row = np.arange(total, dtype=np.int64) - np.repeat(starts, counts)
+
+    def __len__(self):
+        return len(self.quest)
+
+
+def _validate_vectorized(quests):
+    violations = []
+    for section in ROW_TYPES:
+        columns = SectionColumns(quests, section)
+        if not len(columns):
+            continue
+        for rule_section, code, message, predicate in RULES:
+            if rule_section != section:
+                continue
+            hits = np.flatnonzero(predicate(columns.columns))
+            for quest_index, row in zip(columns.quest[hits].tolist(), columns.row[hits].tolist()):
+                violations.append(RuleViolation(quest_index, quests[quest_index].UniqID, section, row,
+                                                code, message))
+    return violations
+
+
+def _validate_rows(quests):
+    rules = {section: [rule for rule in RULES if rule[0] == section] for section in ROW_TYPES}
+    violations = []
+    for quest_index, quest in enumerate(quests):
+        for section in ROW_TYPES:
+            for position, row in enumerate(getattr(quest, section)):
+                values = row.to_dict()
+                for _, code, message, predicate in rules[section]:
+                    if predicate(values):
+                        violations.append(RuleViolation(quest_index, quest.UniqID, section, position,
+                                                        code, message))
+    return violations
+
+
+def validate_quests(quests, vectorized=None):
+    """Every rule violation across quests, ordered by quest, section and row
+
+    vectorized defaults to whether NumPy is available.
+    """
+    quests = list(quests)
+    if vectorized is None:
+        vectorized = np is not None
+    elif vectorized and np is None:
+        raise ImportError("Vectorized validation needs NumPy (pip install numpy)")
+    violations = _validate_vectorized(quests) if vectorized else _validate_rows(quests)
+    order = {section: i for i, section in enumerate(ROW_TYPES)}
+    violations.sort(key=lambda v: (v.quest, order[v.section], v.row))
+    return violations
@@ -0,0 +1,166 @@
+"""Declarative layout of the QuestInfo document
+
+QUEST_SCHEMA describes the document once, in order: the leaf text fields,
+the counted row sections (condition/Goals/RewardNumber with their rows) and
+the fixed trailer. quest_xml compiles it into per-profile output templates
+and a read plan per row layout for import, and the GUI takes its column
+lists from it, so export, import and the editors cannot drift apart.
+
+A layout is a tuple of (tag, kind, value) nodes:
+
+    FIELD   value is the row field whose integer is the element text
+    CONST   value is fixed element text
+    GROUP   value is a tuple of child nodes (empty: a self-closing tag)
+
+CONST nodes and groups without fields are what the model does not hold;
+import keeps their source verbatim when it differs from the default.
+"""
+from dataclasses import dataclass, field
+
+from quest_model import QUEST_FIELD_NAMES, QuestCondition, QuestGoal, RewardQuantity
+
+FIELD = "field"
+CONST = "const"
+GROUP = "group"
+
+
+def flat_layout(row_class):
+    """Layout of a row whose fields are direct children named after the field"""
+    return tuple((name, FIELD, name) for name in row_class.field_names())
+
+
+def layout_fields(layout):
+    """Row fields written by a layout, in document order"""
+    names = []
+    for _, kind, value in layout:
+        if kind == FIELD:
+            names.append(value)
+        elif kind == GROUP:
+            names.extend(layout_fields(value))
+    return names
+
+
+def _node_at(layout, path):
+    """The node at a "/"-separated tag path in layout, or None"""
+    node = None
+    for tag in path.split("/"):
+        node = next((child for child in layout if child[0] == tag), None)
+        if node is None:
+            return None
+        layout = node[2] if node[1] == GROUP else ()
+    return node
+
+
+@dataclass(frozen=True, slots=True)
+class RowSection:
+    attr: str               # QuestInfo list attribute
+    count_tag: str          # element holding the row count
+    section_tag: str        # wrapper element, omitted when there are no rows
+    row_tag: str
+    row_class: type
+    layout: tuple           # children of each row element
+    selector: str = None    # field choosing a layout from variants
+    variants: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        columns = set(self.columns)
+        written = set()
+        for layout in self.layouts():
+            names = layout_fields(layout)
+            if not columns.issuperset(names):
+                raise ValueError(f"{self.row_tag} layout writes unknown fields: {set(names) - columns}")
+            written.update(names)
+        if written != columns:
+            raise ValueError(f"{self.row_tag} layouts never write: {columns - written}")
+        if self.selector is not None and any((self.selector, FIELD, self.selector) not in layout
+                                             for layout in self.layouts()):
+            raise ValueError(f"{self.row_tag} selector {self.selector} must be a direct child in every layout")
+
+    @property
+    def columns(self):
+        """Row field names in model, treeview and popup order"""
+        return self.row_class.field_names()
+
+    def layouts(self):
+        """Every layout a row may take, variants first"""
+        return tuple(self.variants.values()) + (self.layout,)
+
+    def layout_for(self, row):
+        """Layout used to write row"""
+        if self.selector is None:
+            return self.layout
+        return self.variants.get(getattr(row, self.selector), self.layout)
+
+    def carried_passthrough(self, old_row, row):
+        """old_row's passthrough entries that still apply when row replaces it
+
+        Entries anchored on a node that row's layout lacks or lays out
+        differently (a new RewardType) are dropped.
+        """
+        if not old_row.passthrough:
+            return None
+        old_layout, layout = self.layout_for(old_row), self.layout_for(row)
+        if old_layout is layout:
+            return old_row.passthrough
+        kept = {}
+        for key, value in old_row.passthrough.items():
+            path = key.rstrip("+").rstrip("/")  # "+" keys are anchored on their node or parent
+            if not path or _node_at(old_layout, path) == _node_at(layout, path):
+                kept[key] = value
+        return kept or None
+
+
+@dataclass(frozen=True, slots=True)
+class QuestSchema:
+    fields: tuple           # leaf text elements, after <QuestInfo>
+    sections: tuple         # RowSection, after the fields
+    trailer: tuple          # layout closing the document
+
+
+REWARD_HEAD = (
+    ("Reward", FIELD, "Reward"),
+    ("RewardType", FIELD, "RewardType"),
+)
+
+# RewardType 0: money, RewardItem/RewardAmount are not written
+MONEY_REWARD_LAYOUT = REWARD_HEAD + (
+    ("QuestRewardMoney", GROUP, (
+        ("QuestRewardMoneyItem", GROUP, (
+            ("RewardMoney", FIELD, "RewardMoney"),
+            ("RewardUnk", CONST, "0"),
+        )),
+    )),
+    ("QuestRewardItems", GROUP, ()),
+)
+
+# Any other RewardType: item, RewardMoney is not written
+ITEM_REWARD_LAYOUT = REWARD_HEAD + (
+    ("QuestRewardMoney", GROUP, ()),
+    ("QuestRewardItems", GROUP, (
+        ("QuestRewardItemsItem", GROUP, (
+            ("RewardItem", FIELD, "RewardItem"),
+            ("RewardAmount", FIELD, "RewardAmount"),
+        )),
+    )),
+)
+
+TRAILER_LAYOUT = (
+    ("QuestItems", GROUP, ()),
+    ("Event", GROUP, (("EventId", CONST, "0"),) * 4),
+)
+
+QUEST_SCHEMA = QuestSchema(
+    fields=QUEST_FIELD_NAMES,
+    sections=(
+        RowSection("conditions", "condition", "QuestConditions", "QuestCondition",
+                   QuestCondition, flat_layout(QuestCondition)),
+        RowSection("goals", "Goals", "QuestGoals", "QuestGoal",
+                   QuestGoal, flat_layout(QuestGoal)),
+        RowSection("rewards", "RewardNumber", "RewardQuantities", "RewardQuantity",
+                   RewardQuantity, ITEM_REWARD_LAYOUT, "RewardType", {0: MONEY_REWARD_LAYOUT}),
+    ),
+    trailer=TRAILER_LAYOUT,
+)
+
+# Row sections by QuestInfo attribute
+QUEST_SECTIONS = {section.attr: section for section in QUEST_SCHEMA.sections}
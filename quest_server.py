@@ -0,0 +1,182 @@
+"""Local HTTP generation service (standard library only)
+
+Endpoints, all taking and returning UTF-8:
+
+    GET  /health     {"status": "ok"}
+    POST /generate   one quest JSON object -> the quest XML file text
+    POST /validate   one quest JSON object -> {"valid": ..., "errors": [...],
+                     "warnings": [...]}, the warnings being the row rule
+                     violations the CLI validate command reports
+    POST /batch      {"quests": [...]} or a list -> {"results": [...]}, one
+                     {"UniqID", "file", "xml"} or {"index", "errors"} per quest
+
+/generate and /batch take ?profile=compact for minified XML. Connections
+are kept alive (HTTP/1.1) and served by a fixed-size thread pool, so a
+burst of clients queues instead of spawning unbounded threads.
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from quest_model import QuestInfo
+from quest_rules import validate_quests
+from quest_xml import OUTPUT_PROFILES, PRETTY_PROFILE, quest_file_text
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# Seconds an idle keep-alive connection may hold a worker
+IDLE_TIMEOUT = 15
+
+
+def quest_from_json(data):
+    """Build a quest from decoded JSON; return (quest, errors)"""
+    if not isinstance(data, dict):
+        return None, ["quest must be a JSON object"]
+    try:
+        return QuestInfo.from_dict(data), []
+    except (ValueError, TypeError, AttributeError) as e:
+        return None, [f"invalid quest: {e}"]
+
+
+def quest_xml_from_json(data, profile):
+    """Render decoded JSON as quest file text; return (quest, text, errors)"""
+    quest, errors = quest_from_json(data)
+    if errors:
+        return None, None, errors
+    try:
+        return quest, quest_file_text(quest, profile), []
+    except ValueError as e:
+        return None, None, [f"invalid quest: {e}"]
+
+
+class QuestRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "QuestXML"
+    timeout = IDLE_TIMEOUT
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload, ensure_ascii=False), "application/json")
+
+    def read_json(self):
+        """Decoded request body, or None after sending an error response"""
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.send_json(411, {"errors": ["Content-Length required"]})
+            self.close_connection = True
+            return None
+        if length < 0:
+            self.send_json(400, {"errors": ["Content-Length must not be negative"]})
+            self.close_connection = True
+            return None
+        if length > MAX_BODY_SIZE:
+            self.send_json(413, {"errors": [f"body larger than {MAX_BODY_SIZE} bytes"]})
+            self.close_connection = True
+            return None
+        try:
+            return json.loads(self.rfile.read(length).decode("utf-8"))
+        except (ValueError, UnicodeDecodeError) as e:
+            self.send_json(400, {"errors": [f"invalid JSON: {e}"]})
+            return None
+
+    def profile(self, query):
+        name = parse_qs(query).get("profile", [PRETTY_PROFILE.name])[0]
+        return OUTPUT_PROFILES.get(name)
+
+    def do_GET(self):
+        if urlsplit(self.path).path == "/health":
+            self.send_json(200, {"status": "ok"})
+        else:
+            self.send_json(404, {"errors": ["not found"]})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        # Always consume the body first, so errors leave the connection usable
+        data = self.read_json()
+        if data is None:
+            return
+        handler = {"/generate": self.generate, "/validate": self.validate, "/batch": self.batch}.get(url.path)
+        if handler is None:
+            self.send_json(404, {"errors": ["not found"]})
+            return
+        profile = self.profile(url.query)
+        if profile is None:
+            self.send_json(400, {"errors": [f"profile must be one of: {', '.join(OUTPUT_PROFILES)}"]})
+            return
+        handler(data, profile)
+
+    def generate(self, data, profile):
+        _, text, errors = quest_xml_from_json(data, profile)
+        if errors:
+            self.send_json(422, {"errors": errors})
+        else:
+            self.send_body(200, text, "application/xml")
+
+    def validate(self, data, profile):
+        quest, _, errors = quest_xml_from_json(data, profile)
+        warnings = [] if errors else [str(violation) for violation in validate_quests([quest])]
+        self.send_json(200, {"valid": not errors, "errors": errors, "warnings": warnings})
+
+    def batch(self, data, profile):
+        if isinstance(data, dict):
+            data = data.get("quests")
+        if not isinstance(data, list):
+            self.send_json(400, {"errors": ['expected a list of quests or {"quests": [...]}']})
+            return
+        results = []
+        for index, item in enumerate(data):
+            quest, text, errors = quest_xml_from_json(item, profile)
+            if errors:
+                results.append({"index": index, "errors": errors})
+            else:
+                results.append({"UniqID": quest.UniqID, "file": quest.file_name(), "xml": text})
+        self.send_json(200, {"results": results})
+
+
+class QuestServer(HTTPServer):
+    """HTTP server whose connections run on a bounded thread pool"""
+
+    def __init__(self, address, workers=8, verbose=False):
+        super().__init__(address, QuestRequestHandler)
+        self.verbose = verbose
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quest-http")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        """Serve one connection on a pool worker, then close it"""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def serve(host="127.0.0.1", port=8765, workers=8, verbose=False):
+    """Run the service until interrupted"""
+    with QuestServer((host, port), workers=workers, verbose=verbose) as server:
+        print(f"Serving quest generation on http://{host}:{server.server_address[1]} ({workers} workers)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,136 @@
+"""Shared string catalog for quest text fields
+
+Text such as TitleTab ("Silver Lake"), Helper, Process and Expert repeats
+across many quests. A catalog export stores each distinct value once in
+quest_strings.json and writes quests.json with the text fields replaced by
+catalog ids, so loaders read (and keep in memory) one copy per string.
+"""
+import json
+import os
+import sys
+
+from quest_model import TEXT_FIELD_NAMES, QuestInfo
+from quest_xml import atomic_write
+
+# File names written by export_catalog
+CATALOG_FILE_NAME = "quest_strings.json"
+CATALOG_QUESTS_FILE_NAME = "quests.json"
+
+# Size of one string reference in a binary consumer (uint32 id)
+STRING_ID_SIZE = 4
+
+
+class StringCatalog:
+    """Deduplicated strings with stable integer ids, in first-seen order"""
+
+    def __init__(self, strings=()):
+        self.strings = []
+        self.ids = {}
+        for text in strings:
+            self.intern(text)
+
+    def __len__(self):
+        return len(self.strings)
+
+    def intern(self, text):
+        """Id for text, adding it on first sight"""
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.ids[text] = len(self.strings)
+            self.strings.append(text)
+        return string_id
+
+    def shared(self, text):
+        """The catalog's own copy of text, so equal values share one object"""
+        return self.strings[self.intern(text)]
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+
+def intern_quest_text(quests, catalog=None):
+    """Point equal text fields of quests at one shared string object
+
+    Quests parsed from separate files each hold their own copy of every
+    text value; after this, a library keeps one copy per distinct value.
+    Returns the catalog used.
+    """
+    catalog = catalog if catalog is not None else StringCatalog()
+    for quest in quests:
+        for name in TEXT_FIELD_NAMES:
+            setattr(quest, name, catalog.shared(getattr(quest, name)))
+    return catalog
+
+
+class CatalogReport:
+    """Disk and memory use of quest text with and without a shared catalog"""
+
+    def __init__(self, quests):
+        self.values = 0
+        self.raw_bytes = 0
+        self.raw_memory = 0
+        catalog = StringCatalog()
+        for quest in quests:
+            for name in TEXT_FIELD_NAMES:
+                text = getattr(quest, name)
+                self.values += 1
+                self.raw_bytes += len(text.encode("utf-8"))
+                self.raw_memory += sys.getsizeof(text)
+                catalog.intern(text)
+        self.unique = len(catalog)
+        self.catalog_bytes = sum(len(text.encode("utf-8")) for text in catalog.strings) \
+            + STRING_ID_SIZE * self.values
+        self.catalog_memory = sum(sys.getsizeof(text) for text in catalog.strings)
+
+    @staticmethod
+    def _saving(before, after):
+        return 100.0 * (before - after) / before if before else 0.0
+
+    def format(self):
+        return "\n".join([
+            f"Text values: {self.values} ({self.unique} unique)",
+            f"Disk:   {self.raw_bytes} bytes inline -> {self.catalog_bytes} bytes as catalog + ids "
+            f"({self._saving(self.raw_bytes, self.catalog_bytes):.1f}% saved)",
+            f"Memory: {self.raw_memory} bytes of strings -> {self.catalog_memory} bytes interned "
+            f"({self._saving(self.raw_memory, self.catalog_memory):.1f}% saved)",
+        ])
+
+
+def export_catalog(quests, directory):
+    """Write quest_strings.json and quests.json (text fields as catalog ids)
+
+    Records are QuestInfo.to_dict(), so passthrough XML is not exported.
+    Returns the catalog.
+    """
+    os.makedirs(directory, exist_ok=True)
+    catalog = StringCatalog()
+    records = []
+    for quest in quests:
+        record = quest.to_dict()
+        for name in TEXT_FIELD_NAMES:
+            record[name] = catalog.intern(record[name])
+        records.append(record)
+
+    with atomic_write(os.path.join(directory, CATALOG_FILE_NAME)) as f:
+        json.dump({"strings": catalog.strings}, f, ensure_ascii=False, indent=1)
+    with atomic_write(os.path.join(directory, CATALOG_QUESTS_FILE_NAME)) as f:
+        json.dump({"quests": records}, f, ensure_ascii=False, separators=(",", ":"))
+    return catalog
+
+
+def load_catalog_export(directory):
+    """Read quests back from a catalog export, sharing one copy of each string"""
+    with open(os.path.join(directory, CATALOG_FILE_NAME), encoding="utf-8") as f:
+        catalog = StringCatalog(json.load(f)["strings"])
+    with open(os.path.join(directory, CATALOG_QUESTS_FILE_NAME), encoding="utf-8") as f:
+        records = json.load(f)["quests"]
+
+    quests = []
+    for record in records:
+        text = {name: catalog[record.pop(name)] for name in TEXT_FIELD_NAMES if name in record}
+        quest = QuestInfo.from_dict(record)
+        for name, value in text.items():
+            setattr(quest, name, value)
+        quest.touch()
+        quests.append(quest)
+    return quests
@@ -0,0 +1,152 @@
+"""Watch mode: poll quest sources and regenerate only what changed
+
+Sources are quest definition files (JSON/CSV) or hand-edited XML, given as
+files or directories. Each poll compares (mtime_ns, size) snapshots, so no
+file system notification bindings are needed. Changes are collected until
+the sources have been quiet for the debounce delay, which folds a burst of
+saves into one rebuild. Only the changed files are reloaded and validated.
+Only quests that differ from their previous definition are re-rendered,
+through the output directory's build manifest.
+"""
+import os
+import time
+
+from quest_batch import SOURCE_FORMATS, validate_source
+from quest_manifest import BuildManifest
+from quest_xml import PRETTY_PROFILE
+
+
+def iter_source_files(source, exclude=None):
+    """Yield quest source files for a file or directory, skipping exclude and dot files"""
+    if not os.path.isdir(source):
+        yield source
+        return
+    stack = [source]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    if os.path.abspath(entry.path) != exclude:
+                        stack.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in SOURCE_FORMATS and entry.is_file():
+                    yield entry.path
+
+
+class QuestWatcher:
+    """Keeps an output directory in step with a set of quest sources"""
+
+    def __init__(self, sources, output, fmt=None, profile=PRETTY_PROFILE, jobs=1, debounce=0.5, log=print):
+        self.sources = list(sources)
+        self.output = output
+        self.fmt = fmt
+        self.profile = profile
+        self.jobs = jobs
+        self.debounce = debounce
+        self.log = log
+        self.manifest = BuildManifest(output)
+        self.snapshot = {}
+        # Quests last loaded from each source file, by UniqID
+        self.file_quests = {}
+        self.pending = set()
+        self.last_change = None
+
+    def scan(self):
+        """(mtime_ns, size) for every source file"""
+        exclude = os.path.abspath(self.output)
+        snapshot = {}
+        for source in self.sources:
+            for path in iter_source_files(source, exclude):
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def _load(self, path):
+        """Load and validate one source; None if it could not be read at all"""
+        result = validate_source(path, self.fmt)
+        for error in result.errors:
+            self.log(f"  {path}: {error}")
+        if result.errors and not result.quests:
+            return None
+        return {quest.UniqID: quest for quest in result.quests}
+
+    def _resolve(self, uniq_ids=None):
+        """Current definition of each UniqID (later files win on collisions)"""
+        current = {}
+        for path in sorted(self.file_quests):
+            for uniq_id, quest in self.file_quests[path].items():
+                if uniq_ids is None or uniq_id in uniq_ids:
+                    current[uniq_id] = quest
+        return current
+
+    def start(self):
+        """Load every source and bring the output up to date"""
+        self.snapshot = self.scan()
+        for path in sorted(self.snapshot):
+            self.file_quests[path] = self._load(path) or {}
+        result = self.manifest.update(list(self._resolve().values()), jobs=self.jobs, profile=self.profile)
+        self._report(result)
+        return result
+
+    def poll(self, now=None):
+        """Check the sources once; rebuild when changes have settled
+
+        Returns the build result when a rebuild wrote anything, otherwise None.
+        """
+        now = time.monotonic() if now is None else now
+        current = self.scan()
+        changed = {path for path in current.keys() | self.snapshot.keys()
+                   if current.get(path) != self.snapshot.get(path)}
+        self.snapshot = current
+        if changed:
+            self.pending |= changed
+            self.last_change = now
+        if self.pending and now - self.last_change >= self.debounce:
+            paths, self.pending = self.pending, set()
+            return self.rebuild(paths)
+        return None
+
+    def rebuild(self, paths):
+        """Reload the given source files and regenerate the quests they affect
+
+        Returns None when no quest definition actually changed.
+        """
+        touched = set()
+        for path in sorted(paths):
+            old = self.file_quests.pop(path, {})
+            new = self._load(path) if path in self.snapshot else {}
+            if new is None:
+                # Unreadable (often a save in progress): keep the last good definitions
+                self.file_quests[path] = old
+                continue
+            if new:
+                self.file_quests[path] = new
+            touched.update(uniq_id for uniq_id in old.keys() | new.keys() if old.get(uniq_id) != new.get(uniq_id))
+
+        if not touched:
+            return None
+        current = self._resolve(touched)
+        result = self.manifest.apply(list(current.values()), touched - current.keys(),
+                                     jobs=self.jobs, profile=self.profile)
+        self._report(result)
+        return result
+
+    def _report(self, result):
+        self.log(f"[{time.strftime('%H:%M:%S')}] build {self.manifest.build}: "
+                 f"{len(result['added'])} added, {len(result['changed'])} changed, "
+                 f"{len(result['removed'])} removed, {len(result['unchanged'])} unchanged")
+
+    def run(self, interval=1.0):
+        """Poll until interrupted (Ctrl+C)"""
+        self.start()
+        try:
+            while True:
+                time.sleep(interval)
+                self.poll()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,913 @@
+"""QuestInfo XML generation and parsing for the headless quest model
+
+Import is lossless: elements the model does not hold (QuestItems, Event,
+RewardUnk, anything unknown) are kept as their verbatim source text in the
+quest's or row's passthrough dict and written back unchanged. Keys are
+element paths relative to the quest or row ("Event",
+"QuestRewardMoney/QuestRewardMoneyItem/RewardUnk") for a replaced schema
+element, and "<path>+" for the unknown elements following it ("+" alone,
+or "<parent path>/+", for those before the first known child). Elements
+that match what the schema writes by default are not stored.
+"""
+import codecs
+import os
+import pyexpat
+import re
+import stat
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager, nullcontext
+
+from quest_model import QuestInfo
+from quest_schema import CONST, FIELD, GROUP, QUEST_SCHEMA, layout_fields
+
+# Headers used by saved files and by minidom's toprettyxml (preview)
+XML_FILE_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+XML_PREVIEW_HEADER = '<?xml version="1.0" ?>\n'
+
+
+def _keeps_source(kind, value):
+    """True for nodes passthrough source may replace: those writing no fields"""
+    return kind == CONST or (kind == GROUP and not layout_fields(value))
+
+
+def _append_source(parent, spans):
+    """Append passthrough elements, parsed from their source text"""
+    for span in spans:
+        parent.append(ET.fromstring(span))
+
+
+def _build_nodes(parent, layout, values, passthrough=None, path=""):
+    """Append a layout's nodes under parent; values maps row fields to values"""
+    passthrough = passthrough or {}
+    for tag, kind, value in layout:
+        key = path + tag
+        if key in passthrough and _keeps_source(kind, value):
+            parent.append(ET.fromstring(passthrough[key]))
+        else:
+            elem = ET.SubElement(parent, tag)
+            if kind == FIELD:
+                elem.text = str(values[value])
+            elif kind == CONST:
+                elem.text = value
+            else:
+                _append_source(elem, passthrough.get(f"{key}/+", ()))
+                _build_nodes(elem, value, values, passthrough, f"{key}/")
+        _append_source(parent, passthrough.get(f"{key}+", ()))
+
+
+def build_quest_element(quest):
+    """Build the QuestInfo element tree for a quest, following QUEST_SCHEMA"""
+    try:
+        root = ET.Element("QuestInfo")
+        extras = quest.passthrough
+        _append_source(root, extras.get("+", ()))
+
+        for field_name in QUEST_SCHEMA.fields:
+            ET.SubElement(root, field_name).text = getattr(quest, field_name)
+            _append_source(root, extras.get(f"{field_name}+", ()))
+
+        # Count element, then the rows (wrapper omitted when empty)
+        for section in QUEST_SCHEMA.sections:
+            rows = getattr(quest, section.attr)
+            ET.SubElement(root, section.count_tag).text = str(len(rows))
+            _append_source(root, extras.get(f"{section.count_tag}+", ()))
+            if rows:
+                wrapper = ET.SubElement(root, section.section_tag)
+                _append_source(wrapper, extras.get(f"{section.section_tag}/+", ()))
+                for row in rows:
+                    elem = ET.SubElement(wrapper, section.row_tag)
+                    _append_source(elem, (row.passthrough or {}).get("+", ()))
+                    _build_nodes(elem, section.layout_for(row), row.to_dict(), row.passthrough)
+            _append_source(root, extras.get(f"{section.section_tag}+", ()))
+
+        _build_nodes(root, QUEST_SCHEMA.trailer, {}, extras)
+        return root
+
+    except Exception as e:
+        raise Exception(f"Failed to generate XML: {str(e)}")
+
+
+# Characters outside the XML 1.0 Char production; no escape makes them legal
+_INVALID_XML_CHAR = re.compile("[^\t\n\r\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]")
+
+
+def escape_text(text, name="text"):
+    """Escape element text exactly like the ElementTree -> minidom round trip did
+
+    Raises ValueError naming the field (name) for characters XML cannot
+    hold, which the minidom reparse used to reject.
+    """
+    invalid = _INVALID_XML_CHAR.search(text)
+    if invalid:
+        raise ValueError(f"{name} contains {invalid.group()!r} at position {invalid.start()}, "
+                         f"which XML does not allow")
+    if "\r" in text:
+        # The XML parser normalized line endings on reparse
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+# Markup in passthrough source: comments, CDATA, PIs, then tags (">" may sit in quoted attributes)
+_MARKUP = re.compile(r"""<!--.*?-->|<!\[CDATA\[.*?\]\]>|<\?.*?\?>|<(?:[^>"']|"[^"]*"|'[^']*')*>""", re.S)
+
+
+def _fit_source(source, indent, level, newline):
+    """Passthrough source with its formatting whitespace redone for a profile
+
+    In elements holding only child nodes and whitespace, the whitespace is
+    replaced by line breaks and indentation at level, as for generated
+    elements (nothing, when compact). Text, tags and mixed content stay
+    verbatim.
+    """
+    pieces = []
+    frames = []     # per open element: [child piece indexes, whitespace piece indexes, mixed]
+    element_only = []
+    position = 0
+    for match in _MARKUP.finditer(source):
+        text = source[position:match.start()]
+        position = match.end()
+        if text and frames:
+            frames[-1][2 if text.strip(" \t\r\n") else 1].append(len(pieces))
+        pieces.append(text)
+        markup = match.group()
+        if markup.startswith("</"):
+            frame = frames.pop()
+            if frame[0] and not frame[2]:
+                element_only.append((frame, len(pieces), len(frames)))
+        elif frames:
+            if markup.startswith("<![CDATA["):
+                frames[-1][2].append(len(pieces))
+            else:
+                frames[-1][0].append(len(pieces))
+        if not markup.startswith(("</", "<!", "<?")) and not markup.endswith("/>"):
+            frames.append([[], [], []])
+        pieces.append(markup)
+    pieces.append(source[position:])
+
+    breaks = {}
+    for (children, spaces, _), close, depth in element_only:
+        for index in spaces:
+            pieces[index] = ""
+        for index in children:
+            breaks[index] = newline + indent * (level + depth + 1)
+        breaks[close] = newline + indent * (level + depth)
+    return "".join(breaks.get(index, "") + piece for index, piece in enumerate(pieces))
+
+
+def _unknown_lines(indent, level, newline, spans):
+    """Passthrough unknown elements at an indent level, one per line"""
+    pad = indent * level
+    return "".join(f"{pad}{_fit_source(span, indent, level, newline)}{newline}" for span in spans)
+
+
+def _layout_lines(layout, indent, level, newline, values, passthrough=None, path=""):
+    """Text of a layout's nodes at an indent level
+
+    values maps each row field to its value (or, for templates, its
+    str.format placeholder). Passthrough source replaces the nodes it
+    names and adds the unknown elements anchored after them.
+    """
+    pad = indent * level
+    lines = []
+    for tag, kind, value in layout:
+        key = path + tag
+        raw = passthrough.get(key) if passthrough and _keeps_source(kind, value) else None
+        if raw is not None:
+            lines.append(f"{pad}{_fit_source(raw, indent, level, newline)}{newline}")
+        elif kind == FIELD:
+            lines.append(f"{pad}<{tag}>{values[value]}</{tag}>{newline}")
+        elif kind == CONST:
+            lines.append(f"{pad}<{tag}>{value}</{tag}>{newline}")
+        elif value:
+            inner = _unknown_lines(indent, level + 1, newline, passthrough.get(f"{key}/+", ())) if passthrough else ""
+            lines.append(f"{pad}<{tag}>{newline}" + inner
+                         + _layout_lines(value, indent, level + 1, newline, values, passthrough, f"{key}/")
+                         + f"{pad}</{tag}>{newline}")
+        else:
+            lines.append(f"{pad}<{tag}/>{newline}")
+        if passthrough and f"{key}+" in passthrough:
+            lines.append(_unknown_lines(indent, level, newline, passthrough[f"{key}+"]))
+    return "".join(lines)
+
+
+class OutputProfile:
+    """Indentation and line breaks of generated XML, with QUEST_SCHEMA compiled for them
+
+    Every tag, indent and row block is rendered into a template once, so
+    writing a quest only formats values into precomputed strings.
+    PRETTY_PROFILE reproduces toprettyxml(indent="  ") and is what the
+    preview shows; COMPACT_PROFILE drops all formatting whitespace for
+    production builds. Element text is never changed by either.
+    """
+
+    def __init__(self, name, indent, newline, schema=QUEST_SCHEMA):
+        self.name = name
+        self.indent = indent
+        self.newline = newline
+        self.schema = schema
+        self.root_open = f"<QuestInfo>{newline}"
+        self.root_close = f"</QuestInfo>{newline}"
+        # (field, open tag, close tag, self-closing line for empty text)
+        self.fields = tuple((tag, f"{indent}<{tag}>", f"</{tag}>{newline}", f"{indent}<{tag}/>{newline}")
+                            for tag in schema.fields)
+        # (attr, count open, count close, wrapper open, wrapper close,
+        #  selector, {selector value: row formatter}, default row formatter)
+        self.sections = tuple(self._compile_section(section, indent, newline) for section in schema.sections)
+        self.trailer = _layout_lines(schema.trailer, indent, 1, newline, {}) + self.root_close
+
+    @staticmethod
+    def _compile_section(section, indent, newline):
+        # Rows are formatted from row.values(), so placeholders are column positions
+        slots = {name: f"{{{position}}}" for position, name in enumerate(section.columns)}
+
+        def row_format(layout):
+            return _layout_lines(((section.row_tag, GROUP, layout),), indent, 2, newline, slots).format
+
+        return (section.attr,
+                f"{indent}<{section.count_tag}>", f"</{section.count_tag}>{newline}",
+                f"{indent}<{section.section_tag}>{newline}", f"{indent}</{section.section_tag}>{newline}",
+                section.selector,
+                {value: row_format(layout) for value, layout in section.variants.items()},
+                row_format(section.layout))
+
+
+PRETTY_PROFILE = OutputProfile("pretty", "  ", "\n")
+COMPACT_PROFILE = OutputProfile("compact", "", "")
+
+# Profiles selectable from batch output, by name
+OUTPUT_PROFILES = {profile.name: profile for profile in (PRETTY_PROFILE, COMPACT_PROFILE)}
+
+
+def _passthrough_row(profile, section, row):
+    """Block for a row carrying passthrough source, rendered node by node"""
+    pad = profile.indent * 2
+    nl = profile.newline
+    return (f"{pad}<{section.row_tag}>{nl}"
+            + _unknown_lines(profile.indent, 3, nl, row.passthrough.get("+", ()))
+            + _layout_lines(section.layout_for(row), profile.indent, 3, nl, row.to_dict(), row.passthrough)
+            + f"{pad}</{section.row_tag}>{nl}")
+
+
+def iter_quest_xml(quest, header=XML_FILE_HEADER, profile=PRETTY_PROFILE):
+    """Yield the QuestInfo document in order, in one pass
+
+    With the pretty profile the output is identical to building the
+    element tree and running it through minidom's toprettyxml(indent="  "),
+    without either step. Every chunk is one section of the document (a
+    field line, a row block, a wrapper tag) and, when pretty, made of whole
+    lines, so the chunks double as a section map for incremental preview
+    updates. Passthrough source is written back verbatim in its place,
+    only its formatting whitespace following the profile (see _fit_source).
+    """
+    extras = quest.passthrough
+    pad = profile.indent
+    nl = profile.newline
+    if header:
+        yield header
+    yield profile.root_open
+    if extras and "+" in extras:
+        yield _unknown_lines(pad, 1, nl, extras["+"])
+    for field_name, open_tag, close_tag, empty in profile.fields:
+        text = getattr(quest, field_name)
+        if text:
+            try:
+                text = escape_text(text, field_name)
+            except ValueError as e:
+                raise ValueError(f"UniqID {quest.UniqID}: {e}") from None
+            yield f"{open_tag}{text}{close_tag}"
+        else:
+            # Empty text collapses to a self-closing tag
+            yield empty
+        if extras and f"{field_name}+" in extras:
+            yield _unknown_lines(pad, 1, nl, extras[f"{field_name}+"])
+
+    for section, (attr, count_open, count_close, section_open, section_close, selector, variants, row_format) \
+            in zip(profile.schema.sections, profile.sections):
+        rows = getattr(quest, attr)
+        yield f"{count_open}{len(rows)}{count_close}"
+        if extras and f"{section.count_tag}+" in extras:
+            yield _unknown_lines(pad, 1, nl, extras[f"{section.count_tag}+"])
+        if rows:
+            yield section_open
+            if extras and f"{section.section_tag}/+" in extras:
+                yield _unknown_lines(pad, 2, nl, extras[f"{section.section_tag}/+"])
+            for row in rows:
+                if row.passthrough:
+                    yield _passthrough_row(profile, section, row)
+                elif selector is None:
+                    yield row_format(*row.values())
+                else:
+                    yield variants.get(getattr(row, selector), row_format)(*row.values())
+            yield section_close
+        if extras and f"{section.section_tag}+" in extras:
+            yield _unknown_lines(pad, 1, nl, extras[f"{section.section_tag}+"])
+
+    if extras:
+        yield _layout_lines(profile.schema.trailer, pad, 1, nl, {}, extras) + profile.root_close
+    else:
+        yield profile.trailer
+
+
+def pretty_quest_xml(quest):
+    """Render a quest as indented XML (preview form, minidom header)"""
+    return "".join(iter_quest_xml(quest, XML_PREVIEW_HEADER))
+
+
+def quest_file_text(quest, profile=PRETTY_PROFILE):
+    """Render a quest as the text written to .xml files"""
+    return "".join(iter_quest_xml(quest, XML_FILE_HEADER, profile))
+
+
+# Write buffer for streamed quest files
+WRITE_BUFFER_SIZE = 64 * 1024
+
+
+def _create_temp(directory):
+    """Create an empty temp file in directory with the mode open() would give it"""
+    while True:
+        temp_path = os.path.join(directory, f".quest-{os.urandom(6).hex()}.tmp")
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        except FileExistsError:
+            continue
+        return fd, temp_path
+
+
+@contextmanager
+def atomic_write(file_path, encoding='utf-8', binary=False):
+    """Open a temp file next to file_path and rename it into place on success
+
+    Readers never see a half-written file: on any error the temp file is
+    removed and the existing file_path is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = _create_temp(directory)
+    try:
+        # A replaced file keeps its mode; new files get the umask-based one
+        try:
+            os.chmod(temp_path, stat.S_IMODE(os.stat(file_path).st_mode))
+        except FileNotFoundError:
+            pass
+        if binary:
+            f = open(fd, 'wb', buffering=WRITE_BUFFER_SIZE)
+        else:
+            f = open(fd, 'w', encoding=encoding, newline='', buffering=WRITE_BUFFER_SIZE)
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_quest_file(quest, file_path, profile=PRETTY_PROFILE):
+    """Stream a quest to an .xml file, atomically
+
+    Chunks go straight from the serializer into the buffered file handle,
+    so memory stays flat regardless of how many rows the quest has.
+    """
+    with atomic_write(file_path) as f:
+        f.writelines(iter_quest_xml(quest, XML_FILE_HEADER, profile))
+
+
+def write_quest_bytes(data, file_path):
+    """Atomically write already-rendered quest bytes to file_path"""
+    with atomic_write(file_path, binary=True) as f:
+        f.write(data)
+
+
+class QuestRenderCache:
+    """Rendered XML for one quest, reused until the quest's version changes
+
+    The document body is rendered once; the preview and file forms only
+    differ by their header, and the byte form is encoded on first use.
+    """
+
+    def __init__(self):
+        self.key = None
+        self.sections = ()
+        self.body = ""
+        self._bytes = None
+        self._line_count = None
+
+    def is_current(self, quest):
+        """True if the cached rendering matches the quest's current version"""
+        return self.key == (id(quest), quest.version)
+
+    def store(self, quest, version, sections):
+        """Install sections rendered elsewhere (e.g. from a snapshot) for quest/version"""
+        self.sections = tuple(sections)
+        self.body = "".join(self.sections)
+        self._bytes = None
+        self._line_count = None
+        self.key = (id(quest), version)
+
+    def refresh(self, quest):
+        """Re-render if the quest changed since the cached rendering"""
+        if not self.is_current(quest):
+            self.store(quest, quest.version, iter_quest_xml(quest, ""))
+        return self
+
+    def preview_text(self, quest):
+        """Document with the minidom-style header, as shown in the preview"""
+        return XML_PREVIEW_HEADER + self.refresh(quest).body
+
+    def preview_sections(self, quest):
+        """Preview document as its list of sections (see iter_quest_xml)"""
+        return (XML_PREVIEW_HEADER,) + self.refresh(quest).sections
+
+    def file_text(self, quest):
+        """Document with the UTF-8 header, as written to .xml files"""
+        return XML_FILE_HEADER + self.refresh(quest).body
+
+    def file_bytes(self, quest):
+        """UTF-8 encoded file form"""
+        self.refresh(quest)
+        if self._bytes is None:
+            self._bytes = (XML_FILE_HEADER + self.body).encode('utf-8')
+        return self._bytes
+
+    def line_count(self, quest):
+        """Number of lines in the rendered document, header included"""
+        self.refresh(quest)
+        if self._line_count is None:
+            self._line_count = self.body.count("\n") + 1
+        return self._line_count
+
+
+def _int_text(elem, errors=None, where=None):
+    """Integer value of an element's text, 0 when missing or empty
+
+    With an errors list, an invalid integer is recorded (located by the
+    where tuple) and read as 0 instead of raising ValueError.
+    """
+    if elem is None or not elem.text:
+        return 0
+    try:
+        return int(elem.text)
+    except ValueError:
+        if errors is None:
+            raise
+        errors.append(f"{'/'.join(map(str, where))}: invalid integer {elem.text.strip()!r}")
+        return 0
+
+
+def _first_children(elem):
+    """Map tag -> first child with that tag (what elem.find(tag) returns)"""
+    children = {}
+    for child in elem:
+        children.setdefault(child.tag, child)
+    return children
+
+
+# Modes of the entries of a compiled layout plan
+_READ, _WALK, _CONST, _EMPTY, _KEEP = range(5)
+
+
+def _compile_plan(layout, columns, path=""):
+    """Compile a layout into (entries, known tags, path) for _read_nodes
+
+    Each entry is (tag, mode, column index, field name or passthrough
+    key, detail): _READ entries are read into a column, _WALK entries
+    (groups holding fields) are walked with the sub-plan in detail, and
+    the rest (no fields below) are kept as source when they differ from
+    the default: _CONST text detail, _EMPTY an empty group, _KEEP the
+    node in detail.
+    """
+    entries = []
+    for node in layout:
+        tag, kind, value = node
+        if kind == FIELD:
+            entries.append((tag, _READ, columns.index(value), value, None))
+        elif kind == GROUP and layout_fields(value):
+            entries.append((tag, _WALK, None, None, _compile_plan(value, columns, f"{path}{tag}/")))
+        elif kind == CONST:
+            entries.append((tag, _CONST, None, path + tag, value))
+        elif not value:
+            entries.append((tag, _EMPTY, None, path + tag, None))
+        else:
+            entries.append((tag, _KEEP, None, path + tag, node))
+    return tuple(entries), frozenset(node[0] for node in layout), path
+
+
+def _matches_node(elem, node):
+    """True if elem is what node writes by default, formatting whitespace aside"""
+    tag, kind, value = node
+    if elem.tag != tag or elem.attrib:
+        return False
+    if kind == CONST:
+        return len(elem) == 0 and elem.text == value
+    if (elem.text or "").strip() or len(elem) != len(value):
+        return False
+    return all(not (child.tail or "").strip() and _matches_node(child, child_node)
+               for child, child_node in zip(elem, value))
+
+
+def _element_source(elem):
+    """Serialized elem without its tail, for elements with no source spans"""
+    tail, elem.tail = elem.tail, None
+    try:
+        return ET.tostring(elem, encoding="unicode")
+    finally:
+        elem.tail = tail
+
+
+def _keep_unknown(elem, known, raw, passthrough, path):
+    """Store the source of elem's unknown and repeated children, anchored after the previous known one"""
+    anchor = path + "+"
+    seen = set()
+    for child in elem:
+        if child.tag in known and child.tag not in seen:
+            seen.add(child.tag)
+            anchor = f"{path}{child.tag}+"
+        else:
+            passthrough.setdefault(anchor, []).append(raw(child))
+
+
+def _read_nodes(elem, children, plan, values, errors, where, raw, passthrough):
+    """Read elem's children following a compiled plan, in one pass
+
+    Fields go into values (by column index); elements the model does not
+    hold go into passthrough as source text.
+    """
+    entries, known, path = plan
+    missing = 0
+    for tag, mode, index, name, detail in entries:
+        child = children.get(tag)
+        if child is None:
+            missing += 1
+            continue
+        if mode == _READ:
+            values[index] = _int_text(child, errors, (where, name))
+        elif mode == _WALK:
+            _read_nodes(child, _first_children(child), detail, values, errors, where, raw, passthrough)
+        elif mode == _CONST:
+            # Inlined _matches_node for the common defaults
+            if child.text != detail or child.attrib or len(child):
+                passthrough[name] = raw(child)
+        elif mode == _EMPTY:
+            if len(child) or child.attrib or (child.text and not child.text.isspace()):
+                passthrough[name] = raw(child)
+        elif not _matches_node(child, detail):
+            passthrough[name] = raw(child)
+    # One child per present entry means nothing unknown or repeated
+    if len(elem) != len(entries) - missing:
+        _keep_unknown(elem, known, raw, passthrough, path)
+
+
+# (attr, wrapper tag, row tag, row class, column count, selector,
+#  {selector value: plan}, default plan) per QUEST_SCHEMA section
+_SECTION_READERS = tuple((section.attr, section.section_tag, section.row_tag, section.row_class,
+                          len(section.columns), section.selector,
+                          {value: _compile_plan(layout, section.columns) for value, layout in section.variants.items()},
+                          _compile_plan(section.layout, section.columns))
+                         for section in QUEST_SCHEMA.sections)
+
+# Every tag <QuestInfo> may hold; the rest are kept as unknown elements
+_QUEST_TAGS = frozenset(QUEST_SCHEMA.fields) | frozenset(node[0] for node in QUEST_SCHEMA.trailer) | frozenset(
+    tag for section in QUEST_SCHEMA.sections for tag in (section.count_tag, section.section_tag))
+
+
+def parse_quest_element(root, quest=None, errors=None, spans=None):
+    """Load a QuestInfo element into a quest model
+
+    Fields missing from the XML keep the quest's current value; the
+    condition, goal and reward lists and the passthrough are always
+    replaced. The element's children are indexed in one pass instead of
+    one find() per field, and each row is read in one walk through the
+    plan compiled from QUEST_SCHEMA for its layout (chosen by the row's
+    selector, e.g. RewardType). Pass an errors list to collect invalid
+    integers instead of raising. With spans (see iter_parsed_quests)
+    passthrough keeps the exact source text; otherwise elements are
+    re-serialized.
+    """
+    if quest is None:
+        quest = QuestInfo()
+    raw = spans.source if spans is not None else _element_source
+    children = _first_children(root)
+
+    # Import basic and text fields
+    for field_name in QUEST_SCHEMA.fields:
+        elem = children.get(field_name)
+        if elem is not None and elem.text:
+            quest.set_field(field_name, elem.text)
+
+    # Import conditions, goals and rewards
+    sections = {}
+    passthrough = {}
+    row_passthrough = {}
+    for attr, section_tag, row_tag, row_class, width, selector, variants, default_plan in _SECTION_READERS:
+        rows = sections[attr] = []
+        section = children.get(section_tag)
+        if section is None:
+            continue
+        for elem in section:
+            if elem.tag != row_tag:
+                passthrough.setdefault(f"{section_tag}/+", []).append(raw(elem))
+                continue
+            row_children = _first_children(elem)
+            plan = default_plan
+            if selector is not None:
+                try:
+                    plan = variants.get(_int_text(row_children.get(selector)), default_plan)
+                except ValueError:
+                    # Reported by the walk; the row reads it as 0
+                    plan = variants.get(0, default_plan)
+            values = [0] * width
+            _read_nodes(elem, row_children, plan, values, errors, f"{row_tag}[{len(rows)}]", raw, row_passthrough)
+            row = row_class(*values)
+            if row_passthrough:
+                row.passthrough, row_passthrough = row_passthrough, {}
+            rows.append(row)
+
+    # Trailer elements and unknown QuestInfo children
+    for node in QUEST_SCHEMA.trailer:
+        elem = children.get(node[0])
+        if elem is not None and not _matches_node(elem, node):
+            passthrough[node[0]] = raw(elem)
+    if len(root) != len(children) or not _QUEST_TAGS >= children.keys():
+        _keep_unknown(root, _QUEST_TAGS, raw, passthrough, "")
+
+    for attr, rows in sections.items():
+        setattr(quest, attr, rows)
+    quest.passthrough = passthrough
+    quest.touch()
+    return quest
+
+
+def check_quest_structure(root):
+    """Structural problems in a QuestInfo element: missing elements, bad counts"""
+    problems = []
+    children = _first_children(root)
+    for field_name in QUEST_SCHEMA.fields:
+        if field_name not in children:
+            problems.append(f"missing element <{field_name}>")
+
+    for section in QUEST_SCHEMA.sections:
+        count_tag, section_tag, row_tag = section.count_tag, section.section_tag, section.row_tag
+        wrapper = children.get(section_tag)
+        rows = sum(1 for _ in wrapper.iterfind(row_tag)) if wrapper is not None else 0
+        count_elem = children.get(count_tag)
+        if count_elem is None:
+            problems.append(f"missing element <{count_tag}>")
+            continue
+        try:
+            declared = _int_text(count_elem)
+        except ValueError:
+            problems.append(f"{count_tag}: invalid integer {count_elem.text.strip()!r}")
+            continue
+        if declared != rows:
+            problems.append(f"{count_tag} is {declared} but {section_tag} has {rows} {row_tag}")
+    return problems
+
+
+# Bytes fed to the parser at a time while streaming quest files
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class QuestSpans:
+    """Byte spans of the elements of one streamed QuestInfo
+
+    Valid until the stream advances past the quest.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.spans = {}
+
+    def source(self, elem):
+        """Verbatim source text of elem, without its tail"""
+        start, end = self.spans[elem]
+        buffer = self.stream.buffer
+        start -= self.stream.base
+        end -= self.stream.base
+        # Expat reports an end tag at its "<" and an empty-element tag just past its "/>"
+        if elem.text or len(elem) or buffer[end - 2:end] != b"/>":
+            end = buffer.index(b">", end) + 1
+        return bytes(buffer[start:end]).decode(self.stream.encoding)
+
+
+class _QuestStream:
+    """Expat-driven tree builder recording the byte span of every QuestInfo element
+
+    ElementTree's parsers do not report offsets, so the tree is built here
+    from pyexpat events. Only the bytes from the open (or last finished)
+    QuestInfo onward are kept. Source slices are decoded with the
+    document's declared encoding, or with encoding when it is given (it
+    then overrides the declaration, see iter_quest_sources).
+    """
+
+    def __init__(self, encoding=None):
+        self.parser = pyexpat.ParserCreate(encoding)
+        self.parser.buffer_text = True
+        self.builder = ET.TreeBuilder()
+        self.parser.StartElementHandler = self.start
+        self.parser.EndElementHandler = self.end
+        self.parser.CharacterDataHandler = self.builder.data
+        if encoding is None:
+            self.parser.XmlDeclHandler = self.declaration
+        self.encoding = encoding or "utf-8"
+        self.buffer = bytearray()
+        self.base = 0           # stream offset of buffer[0]
+        self.keep = 0           # earliest stream offset still needed
+        self.starts = []        # start offsets of the open elements
+        self.parents = []       # the open elements outside any QuestInfo
+        self.quest = None       # QuestSpans of the open QuestInfo
+        self.quest_depth = 0
+        self.done = []          # (QuestInfo element, parent, QuestSpans) finished by the last feed
+
+    def declaration(self, version, encoding, standalone):
+        if encoding:
+            self.encoding = encoding
+
+    def start(self, tag, attrs):
+        elem = self.builder.start(tag, attrs)
+        self.starts.append(self.parser.CurrentByteIndex)
+        if self.quest is None:
+            self.keep = self.starts[-1]
+            if tag == "QuestInfo":
+                self.quest = QuestSpans(self)
+                self.quest_depth = len(self.starts)
+            else:
+                self.parents.append(elem)
+
+    def end(self, tag):
+        elem = self.builder.end(tag)
+        start = self.starts.pop()
+        quest = self.quest
+        if quest is None:
+            self.parents.pop()
+            self.keep = self.parser.CurrentByteIndex
+            return
+        # The end offset is resolved to the tag's closing ">" only when read
+        quest.spans[elem] = (start, self.parser.CurrentByteIndex)
+        if len(self.starts) < self.quest_depth:
+            self.done.append((elem, self.parents[-1] if self.parents else None, quest))
+            self.quest = None
+            # Up to the start of the end tag: the rest stays buffered
+            self.keep = self.parser.CurrentByteIndex
+
+    def feed(self, data, final):
+        """Parse the next chunk; final ends the document"""
+        self.buffer += data
+        try:
+            self.parser.Parse(data, final)
+        except pyexpat.ExpatError as e:
+            error = ET.ParseError(str(e))
+            error.code, error.position = e.code, (e.lineno, e.offset)
+            raise error from None
+
+    def trim(self):
+        """Drop the bytes no element span can refer to any more"""
+        if self.keep > self.base:
+            del self.buffer[:self.keep - self.base]
+            self.base = self.keep
+
+
+def _utf16_encoding(head):
+    """Codec for a document starting with head if it is UTF-16, else None"""
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    if head.startswith(b"<\x00?\x00"):
+        return "utf-16-le"
+    if head.startswith(b"\x00<\x00?"):
+        return "utf-16-be"
+    return None
+
+
+def iter_quest_sources(source):
+    """Stream (QuestInfo element, QuestSpans) from a single- or multi-quest XML file
+
+    source is a path or a binary file object. Each element is complete
+    when yielded and is cleared (and detached from its parent) afterwards,
+    so memory stays bounded by one quest no matter how many the file
+    holds. Consume the element and its spans before advancing. Tracking
+    spans runs the tree builder in Python; iter_parsed_quests uses this
+    only for files that need it.
+    """
+    opened = open(source, "rb") if isinstance(source, (str, os.PathLike)) else nullcontext(source)
+    with opened as f:
+        data = f.read(READ_CHUNK_SIZE)
+        while 0 < len(data) < 4:  # enough to tell UTF-16 without a BOM apart
+            more = f.read(READ_CHUNK_SIZE)
+            if not more:
+                break
+            data += more
+        # Spans are byte offsets searched for b">", so UTF-16 input is
+        # transcoded to UTF-8 first; other encodings expat reads are ASCII-based
+        wide = _utf16_encoding(data)
+        decoder = codecs.getincrementaldecoder(wide)() if wide else None
+        stream = _QuestStream("utf-8" if wide else None)
+        while True:
+            stream.feed(data if decoder is None else decoder.decode(data, not data).encode("utf-8"), not data)
+            for elem, parent, spans in stream.done:
+                yield elem, spans
+                elem.clear()
+                if parent is not None:
+                    parent.remove(elem)
+            stream.done.clear()
+            stream.trim()
+            if not data:
+                break
+            data = f.read(READ_CHUNK_SIZE)
+
+
+def iter_quest_elements(source):
+    """Stream the QuestInfo elements of a single- or multi-quest XML file
+
+    Each element is complete when yielded and is cleared (and detached
+    from its parent) afterwards, so memory stays bounded by one quest no
+    matter how many the file holds. Consume the element before advancing.
+    """
+    parents = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            parents.append(elem)
+            continue
+        parents.pop()
+        if elem.tag != "QuestInfo":
+            continue
+        yield elem
+        elem.clear()
+        if parents:
+            parents[-1].remove(elem)
+
+
+class _SpansNeeded(Exception):
+    """A quest read without spans holds source that passthrough must keep"""
+
+
+class _NoSpans:
+    """Spans of a quest streamed by ET.iterparse, which records none"""
+
+    def source(self, elem):
+        raise _SpansNeeded
+
+
+_NO_SPANS = _NoSpans()
+
+
+def iter_parsed_quests(source, parse):
+    """Stream parse(position, elem, spans) for each QuestInfo of an XML file
+
+    Quests are streamed by ET.iterparse. Span tracking (iter_quest_sources)
+    runs in Python and costs more than the parse itself, so it starts only
+    when a quest holds elements passthrough keeps: that quest's parse is
+    abandoned and the file is re-read with spans from it onward. parse may
+    therefore be called twice for the first such quest and must not leave
+    effects behind when interrupted (give it fresh errors lists). source is
+    a path or a seekable binary file object.
+    """
+    start = None if isinstance(source, (str, os.PathLike)) else source.tell()
+    position = 0
+    for elem in iter_quest_elements(source):
+        try:
+            result = parse(position, elem, _NO_SPANS)
+        except _SpansNeeded:
+            break
+        yield result
+        position += 1
+    else:
+        return
+    if start is not None:
+        source.seek(start)
+    for index, (elem, spans) in enumerate(iter_quest_sources(source)):
+        if index >= position:
+            yield parse(index, elem, spans)
+
+
+def iter_quests(source):
+    """Stream QuestInfo models from an XML file"""
+    return iter_parsed_quests(source, lambda _, elem, spans: parse_quest_element(elem, spans=spans))
+
+
+def _child_text(elem, tag):
+    child = elem.find(tag)
+    return (child.text or "").strip() if child is not None else ""
+
+
+def list_quests(source):
+    """Enumerate (index, UniqID, TitleTab) for every quest in a file, without building models"""
+    return [(index, _child_text(elem, "UniqID"), _child_text(elem, "TitleTab"))
+            for index, elem in enumerate(iter_quest_elements(source))]
+
+
+def load_quest(source, uniq_id=None, index=None, quest=None):
+    """Load one quest from a file by UniqID or position (default: the first)
+
+    Streaming stops at the match. Returns None when nothing matches.
+    """
+    def parse(position, elem, spans):
+        if uniq_id is not None:
+            if _child_text(elem, "UniqID") != str(uniq_id):
+                return None
+        elif position != (index or 0):
+            return None
+        return parse_quest_element(elem, quest, spans=spans)
+
+    return next(filter(None, iter_parsed_quests(source, parse)), None)
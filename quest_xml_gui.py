@@ -1,11 +1,195 @@
-import tkinter as tk
-from tkinter import ttk, messagebox, filedialog, scrolledtext
+try:
+    import tkinter as tk
+    from tkinter import ttk, messagebox, filedialog, scrolledtext, simpledialog
+except ImportError:
+    # Headless installs (CI, servers) can still run the batch commands
+    tk = None
 import xml.etree.ElementTree as ET
-from xml.dom import minidom
+import difflib
 import os
+import queue
 import sys
+import threading
+
+from quest_model import (
+    BASIC_FIELDS, TEXT_FIELDS, ROW_TYPES, QuestInfo, QuestCondition, QuestGoal, RewardQuantity,
+    sample_conditions, sample_goals, sample_rewards
+)
+from quest_library import QuestLibraryIndex
+from quest_schema import QUEST_SECTIONS
+from quest_rules import EDITOR_RULES, check_row
+from quest_xref import ID_TABLE_NAMES, find_id_tables, load_id_tables
+from quest_ids import ID_RANGE_SETTING, IdAllocator, find_collisions
+import quest_cli
+from quest_xml import (
+    build_quest_element, write_quest_bytes, iter_quest_xml, list_quests, load_quest, QuestRenderCache
+)
+
+class VirtualTreeview:
+    """Treeview that only materializes the visible rows of a model list
+    
+    Rows are read through a getter, so reloading the model costs nothing
+    here; only the visible window (a screenful of items) is ever built.
+    Item iids are "r<model index>", giving O(1) iid <-> row lookups, and
+    the selection is tracked by model index so it survives scrolling.
+    """
+    
+    def __init__(self, parent, headers, get_rows, height=6, style="Compact.Treeview", rowheight=24):
+        self.get_rows = get_rows
+        self.rowheight = rowheight
+        self.visible = height
+        self.offset = 0
+        self.selected = set()
+        
+        self.frame = tk.Frame(parent, bg=parent.cget('bg'))
+        columns = [f"col{i}" for i in range(len(headers))]
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings",
+                                 height=height, style=style, selectmode="extended")
+        for i, header in enumerate(headers):
+            self.tree.heading(f"col{i}", text=header)
+            self.tree.column(f"col{i}", width=80, anchor='center', minwidth=60)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<ButtonPress-1>", self.on_click, add="+")
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Configure>", self.on_configure)
+        self.tree.bind("<Up>", lambda e: self.on_arrow(-1))
+        self.tree.bind("<Down>", lambda e: self.on_arrow(1))
+    
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+    
+    # Model index <-> item iid
+    @staticmethod
+    def iid(index):
+        return f"r{index}"
+    
+    @staticmethod
+    def index_of(iid):
+        return int(iid[1:])
+    
+    def row_count(self):
+        return len(self.get_rows())
+    
+    def window(self):
+        """Model index range currently materialized"""
+        return range(self.offset, min(self.offset + self.visible, self.row_count()))
+    
+    def refresh(self):
+        """Rebuild the visible window from the model (cost: one screenful)"""
+        rows = self.get_rows()
+        self.offset = max(0, min(self.offset, len(rows) - self.visible))
+        self.selected = {index for index in self.selected if index < len(rows)}
+        
+        children = self.tree.get_children()
+        if children:
+            self.tree.delete(*children)
+        window = self.window()
+        for index in window:
+            self.tree.insert("", tk.END, iid=self.iid(index), values=rows[index].values())
+        
+        visible_selection = [self.iid(index) for index in window if index in self.selected]
+        self.tree.selection_set(visible_selection)
+        self.update_scrollbar()
+    
+    def reset(self):
+        """Show the model from the top with nothing selected (after a bulk reload)"""
+        self.offset = 0
+        self.selected.clear()
+        self.refresh()
+    
+    def refresh_row(self, index):
+        """Update one row in place if it is visible"""
+        if index in self.window():
+            self.tree.item(self.iid(index), values=self.get_rows()[index].values())
+    
+    def see(self, index):
+        """Scroll so that the model row at index is visible"""
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self.visible:
+            self.offset = index - self.visible + 1
+        self.refresh()
+    
+    def select(self, indices):
+        """Replace the selection with the given model indices"""
+        self.selected = set(indices)
+        self.refresh()
+    
+    def selected_indices(self):
+        """Selected model indices, ascending"""
+        return sorted(self.selected)
+    
+    def scroll_to(self, offset):
+        offset = max(0, min(int(offset), self.row_count() - self.visible))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+    
+    def update_scrollbar(self):
+        total = self.row_count()
+        if total <= self.visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + self.visible) / total)
+    
+    # Event handlers
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self.row_count())
+        elif action == "scroll":
+            step = self.visible if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+    
+    def on_mousewheel(self, event):
+        self.scroll_to(self.offset + int(-1 * (event.delta / 120)) * 3)
+        return "break"
+    
+    def on_configure(self, event):
+        # Fit the window to the height the treeview was given by its layout
+        visible = max(1, (event.height - self.rowheight) // self.rowheight)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
+    
+    def on_click(self, event):
+        # A plain click on a row replaces the selection, including rows scrolled
+        # out of view; heading, separator and empty-area clicks leave it alone
+        if event.state & 0x0005:  # Shift / Control held
+            return
+        if self.tree.identify_region(event.x, event.y) in ("cell", "tree"):
+            self.selected.clear()
+    
+    def on_select(self, event=None):
+        window = self.window()
+        visible = {self.index_of(iid) for iid in self.tree.selection()}
+        self.selected = {index for index in self.selected if index not in window} | visible
+    
+    def on_arrow(self, step):
+        focus = self.tree.focus()
+        if not focus:
+            return None
+        index = self.index_of(focus) + step
+        if index not in self.window() and 0 <= index < self.row_count():
+            # Moving past the edge: scroll the window and carry the focus along
+            self.selected = {index}
+            self.see(index)
+            self.tree.focus(self.iid(index))
+            return "break"
+        return None
+
 
 class QuestXMLApp:
+    # Quests with more rows than this are rendered on a worker thread
+    BACKGROUND_RENDER_ROWS = 500
+    # Sections rendered between checks for a newer render request
+    RENDER_CANCEL_CHECK = 256
+    # Milliseconds between checks for finished background renders
+    RENDER_POLL_MS = 20
+
     def __init__(self, root):
         self.root = root
         self.root.title("🎮 Quest XML Generator by Hazmi")
@@ -34,35 +218,40 @@ class QuestXMLApp:
         # Configure compact styling
         self.setup_styles()
         
-        # Initialize data structures
+        # Initialize data structures: the quest model is the source of truth,
+        # quest_data only holds the form widgets bound to it
+        self.quest = QuestInfo()
         self.quest_data = {}
-        self.conditions_data = []
-        self.goals_data = []
-        self.rewards_data = []
+        # Rendered XML, shared by preview, copy, save and statistics
+        self.render_cache = QuestRenderCache()
+        # Sections currently shown in the preview widget (None = unknown)
+        self.preview_sections = None
+        # Background rendering: only the newest token's result is applied.
+        # Workers never touch Tk; they queue (token, version, sections, error)
+        # and the main thread polls the queue while any is outstanding
+        self.render_token = 0
+        self.render_results = queue.Queue()
+        self.render_pending = 0
         
         # Better popup management
         self.active_popups = set()
         
-        # Define all form fields matching the XML structure
-        self.basic_fields = [
-            ("UniqID", "2886"), ("Model", "0"), ("Model2", "0"), ("Level", "30"),
-            ("Pos", "5"), ("Pos2", "0"), ("ManagedID", "0"), ("Active", "1"),
-            ("Unknown", "0"), ("Immediate", "0"), ("ResetQuest", "0"), ("Type", "1"),
-            ("StartTargetType", "0"), ("StartTargetID", "93610"), ("Target", "1"), ("TargetValue", "93613")
-        ]
+        # Quest library index, opened on first use
+        self.library_index = None
+        self.xref_index = None
         
-        self.text_fields = [
-            ("TitleTab", "Silver Lake"), ("TitleText", "View from the Top"),
-            ("Body", "You haven't been explore to the whole area yet, have you? If you go farther to the right, you will see a high ground.\n\nTalk to the Terriermon there, and he'll show you how to get to the top where you will be able to look down at the whole region."),
-            ("Simple", ""), ("Helper", "Speak with Terriermon"), ("Process", "Go on, then. Fly away like me!"),
-            ("Complete", "There's nothing like the view from the top! If you have to get to a higher ground, you have come to the right Digimon!"),
-            ("Expert", "")
-        ]
+        # Render scheduler state: derived views waiting for the next idle tick
+        self.stale_views = set()
+        self.render_job = None
+        
+        # Define all form fields matching the XML structure
+        self.basic_fields = list(BASIC_FIELDS)
+        self.text_fields = list(TEXT_FIELDS)
         
         try:
             self.create_widgets()
             self.create_compact_sidebar()
-            self.update_preview()
+            self.render_now()
             self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
             
         except Exception as e:
@@ -78,6 +267,8 @@ class QuestXMLApp:
                 except tk.TclError:
                     pass
             self.active_popups.clear()
+            if self.library_index is not None:
+                self.library_index.close()
             self.root.quit()
             self.root.destroy()
         except Exception as e:
@@ -337,6 +528,9 @@ class QuestXMLApp:
             ("📋 Sample", self.safe_load_sample_data, self.colors['warning']),
             ("📥 Import", self.safe_import_xml, "#9b59b6"),
             ("📄 Line", self.safe_detect_lines, self.colors['success']),
+            ("📚 Library", self.safe_open_from_library, "#16a085"),
+            ("🔗 ID Tables", self.safe_load_id_tables, self.colors['dark']),
+            ("🆔 New ID", self.safe_allocate_uniq_id, "#8e44ad"),
             ("🗑️ Clear", self.safe_clear_all_data, self.colors['danger']),
         ]
 
@@ -498,14 +692,16 @@ class QuestXMLApp:
                                    anchor='w')
             label_widget.grid(row=row, column=col, sticky='ew', pady=4, padx=(0, 5))
             
-            # Compact entry styling
+            # Compact entry styling, bound to the quest model
+            var = tk.StringVar(value=self.quest.get_field(label))
+            var.trace_add("write", lambda *_, name=label, v=var: self.on_basic_field_changed(name, v.get()))
             entry = tk.Entry(basic_container, width=12, font=("Segoe UI", 8),
+                           textvariable=var,
                            bg=self.colors['white'], fg=self.colors['text'], 
                            relief="solid", bd=1,
                            insertbackground=self.colors['secondary'],
                            highlightthickness=1,
                            highlightcolor=self.colors['secondary'])
-            entry.insert(0, default)
             entry.grid(row=row, column=col+1, pady=4, padx=(0, 10), sticky='ew', ipady=2)
             
             self.add_entry_hover_effect(entry)
@@ -543,11 +739,48 @@ class QuestXMLApp:
                            highlightthickness=1,
                            highlightcolor=self.colors['secondary'],
                            padx=4, pady=3)
-            entry.insert("1.0", default)
+            entry.insert("1.0", self.quest.get_field(label))
+            entry.edit_modified(False)
+            entry.bind("<<Modified>>", lambda e, name=label: self.on_text_field_modified(name, e.widget))
             entry.grid(row=i, column=1, pady=6, padx=5, sticky='ew')
             
             self.quest_data[label] = entry
 
+    def on_basic_field_changed(self, field_name, value):
+        """Sync an edited basic field into the quest model and check its ID reference"""
+        self.quest.set_field(field_name, value)
+        self.check_field_reference(field_name)
+
+    def check_field_reference(self, field_name):
+        """Color a basic field entry red when it references an ID missing from the ID tables"""
+        entry = self.quest_data.get(field_name)
+        if self.xref_index is None or entry is None:
+            return
+        message = self.xref_index.check_field(field_name, self.quest.get_field(field_name))
+        entry.configure(fg=self.colors['danger'] if message else self.colors['text'])
+        if message:
+            self.status_label.configure(text=f"⚠️ {message}")
+
+    def on_text_field_modified(self, field_name, widget):
+        """Sync an edited text widget back into the quest model"""
+        try:
+            if widget.edit_modified():
+                self.quest.set_field(field_name, widget.get("1.0", tk.END))
+                widget.edit_modified(False)
+        except tk.TclError:
+            pass
+
+    def refresh_quest_fields(self):
+        """Push quest model field values into the form widgets"""
+        for field_name, widget in self.quest_data.items():
+            value = self.quest.get_field(field_name)
+            if isinstance(widget, tk.Text):
+                widget.delete("1.0", tk.END)
+                widget.insert("1.0", value)
+            else:
+                widget.delete(0, tk.END)
+                widget.insert(0, value)
+
     def create_compact_data_tab(self, parent):
         """Create compact data tab with responsive scroll behavior"""
         # Create scrollable canvas
@@ -595,7 +828,7 @@ class QuestXMLApp:
         self.create_compact_tree_section(cond_frame, "Conditions", "cond",
                                         self.add_condition_popup, self.edit_condition_popup,
                                         self.delete_condition,
-                                        ["ConditionType", "ConditionId", "ConditionCount"])
+                                        QUEST_SECTIONS["conditions"].columns)
 
         # --- Quest Goals Section ---
         goal_frame = tk.LabelFrame(main_container, text="🎯 Quest Goals",
@@ -609,7 +842,7 @@ class QuestXMLApp:
         self.create_compact_tree_section(goal_frame, "Goals", "goal",
                                         self.add_goal_popup, self.edit_goal_popup,
                                         self.delete_goal,
-                                        ["GoalType", "GoalId", "GoalCount", "goalAmount", "CurTypeCount", "SubValue", "SubValue1"])
+                                        QUEST_SECTIONS["goals"].columns)
 
 
     def create_compact_reward_tab(self, parent):
@@ -638,7 +871,7 @@ class QuestXMLApp:
         
         self.create_compact_tree_section(reward_frame, "Rewards", "reward", 
                                         self.add_reward_popup, self.edit_reward_popup, 
-                                        self.delete_reward, ["Reward", "RewardType", "RewardMoney", "RewardItem", "RewardAmount"])
+                                        self.delete_reward, QUEST_SECTIONS["rewards"].columns)
 
     def create_compact_preview_tab(self, parent):
         """Create compact XML preview tab with line detection"""
@@ -719,19 +952,17 @@ class QuestXMLApp:
         tree_container = tk.Frame(parent, bg=self.colors['card'])
         tree_container.pack(fill=tk.BOTH, expand=True, pady=(0, 8))
         
-        # Create compact treeview
-        columns = [f"col{i}" for i in range(len(headers))]
-        tree = ttk.Treeview(tree_container, columns=columns, show="headings", 
-                           height=6, style="Compact.Treeview")
-        
-        # Configure headers
-        for i, header in enumerate(headers):
-            tree.heading(f"col{i}", text=header)
-            tree.column(f"col{i}", width=80, anchor='center', minwidth=60)
-        
+        # Create compact virtualized treeview over the quest model rows
+        section = {"cond": "conditions", "goal": "goals", "reward": "rewards"}[prefix]
+        item_type = {"cond": "condition", "goal": "goal", "reward": "reward"}[prefix]
+        tree = VirtualTreeview(tree_container, headers, lambda: self.quest.section_rows(section), height=6)
         tree.pack(fill=tk.BOTH, expand=True, padx=4, pady=4)
         setattr(self, f"{prefix}_tree", tree)
         
+        # Clipboard shortcuts for multi-row copy/paste
+        tree.tree.bind("<Control-c>", lambda e: self.safe_wrapper(lambda: self.copy_rows(section, tree))())
+        tree.tree.bind("<Control-v>", lambda e: self.safe_wrapper(lambda: self.paste_rows(section, tree, item_type))())
+        
         # Compact button frame
         btn_frame = tk.Frame(parent, bg=self.colors['card'])
         btn_frame.pack(fill=tk.X, pady=(0, 5))
@@ -740,7 +971,10 @@ class QuestXMLApp:
         buttons = [
             ("➕ Add", add_fn, self.colors['success']),
             ("✏️ Edit", edit_fn, self.colors['warning']),
-            ("🗑️ Delete", del_fn, self.colors['danger'])
+            ("🗑️ Delete", del_fn, self.colors['danger']),
+            ("⧉ Duplicate", lambda: self.duplicate_data(section, tree, item_type), "#3498db"),
+            ("🖊️ Set Column", lambda: self.bulk_edit_data(section, tree, item_type, headers), "#8e44ad"),
+            ("📋 Paste", lambda: self.paste_rows(section, tree, item_type), "#16a085")
         ]
         
         for text, command, color in buttons:
@@ -851,33 +1085,23 @@ class QuestXMLApp:
         """Update statistics in sidebar"""
         try:
             # Total fields filled
-            filled_fields = 0
+            filled_fields = self.quest.filled_field_count()
             total_fields = len(self.basic_fields) + len(self.text_fields)
             
-            for field_name, _ in self.basic_fields + self.text_fields:
-                if field_name in self.quest_data:
-                    widget = self.quest_data[field_name]
-                    if isinstance(widget, tk.Text):
-                        value = widget.get("1.0", tk.END).strip()
-                    else:
-                        value = widget.get().strip()
-                    if value:
-                        filled_fields += 1
-            
             self.stats_labels['total_fields'].configure(text=f"{filled_fields}/{total_fields}")
             
             # Completion percentage
             completion = int((filled_fields / total_fields) * 100) if total_fields > 0 else 0
             self.stats_labels['completion'].configure(text=f"{completion}%")
             
-            # XML lines count
-            xml_content = self.xml_text.get("1.0", tk.END).strip() if hasattr(self, 'xml_text') else ""
-            xml_lines = len(xml_content.split('\n')) if xml_content else 0
-            self.stats_labels['xml_lines'].configure(text=str(xml_lines))
-            
-            # Update line info in preview tab
-            if hasattr(self, 'line_info_label'):
-                self.line_info_label.configure(text=f"Lines: {xml_lines}")
+            # XML lines count (left as-is while a background render is pending)
+            if self.render_cache.is_current(self.quest):
+                xml_lines = self.render_cache.line_count(self.quest)
+                self.stats_labels['xml_lines'].configure(text=str(xml_lines))
+                
+                # Update line info in preview tab
+                if hasattr(self, 'line_info_label'):
+                    self.line_info_label.configure(text=f"Lines: {xml_lines}")
             
         except Exception as e:
             print(f"Warning: Could not update statistics: {e}")
@@ -887,7 +1111,7 @@ class QuestXMLApp:
         try:
             if hasattr(self, 'auto_labels'):
                 # Update condition count
-                cond_count = len(self.conditions_data)
+                cond_count = len(self.quest.conditions)
                 if 'condition' in self.auto_labels:
                     self.auto_labels['condition'].configure(text=str(cond_count))
                     if cond_count == 0:
@@ -896,7 +1120,7 @@ class QuestXMLApp:
                         self.auto_labels['condition'].configure(bg="#d4edda", fg="#155724")
                 
                 # Update goals count
-                goal_count = len(self.goals_data)
+                goal_count = len(self.quest.goals)
                 if 'Goals' in self.auto_labels:
                     self.auto_labels['Goals'].configure(text=str(goal_count))
                     if goal_count == 0:
@@ -905,7 +1129,7 @@ class QuestXMLApp:
                         self.auto_labels['Goals'].configure(bg="#d4edda", fg="#155724")
                 
                 # Update reward count
-                reward_count = len(self.rewards_data)
+                reward_count = len(self.quest.rewards)
                 if 'RewardNumber' in self.auto_labels:
                     self.auto_labels['RewardNumber'].configure(text=str(reward_count))
                     if reward_count == 0:
@@ -914,23 +1138,71 @@ class QuestXMLApp:
                         self.auto_labels['RewardNumber'].configure(bg="#fff3cd", fg="#856404")
                     else:
                         self.auto_labels['RewardNumber'].configure(bg="#d4edda", fg="#155724")
-                        
-            # Update statistics
-            self.update_statistics()
             
         except Exception as e:
             print(f"Warning: Could not update auto counts: {e}")
 
+    # Render scheduler
+    # Derived views, in the order they are refreshed
+    RENDER_VIEWS = ("counts", "tabs", "preview", "statistics")
+
+    def quest_changed(self):
+        """Record a quest row/field mutation and schedule a re-render"""
+        self.quest.touch()
+        self.schedule_render()
+
+    def schedule_render(self, *views):
+        """Mark derived views stale and refresh them once on the next idle tick
+        
+        Every mutation made within one event-loop tick is coalesced into a
+        single recompute. With no arguments, all views are marked stale.
+        """
+        self.mark_views_stale(views)
+        if self.render_job is None:
+            self.render_job = self.root.after_idle(self.flush_render)
+
+    def mark_views_stale(self, views):
+        """Add views (default: all) to the stale set"""
+        self.stale_views.update(views or self.RENDER_VIEWS)
+        # A new preview changes the XML line statistics as well
+        if "preview" in self.stale_views:
+            self.stale_views.add("statistics")
+
+    def flush_render(self):
+        """Refresh only the views that were marked stale"""
+        self.render_job = None
+        stale, self.stale_views = self.stale_views, set()
+        renderers = {
+            "counts": self.update_auto_counts,
+            "tabs": self.update_tab_counts,
+            "preview": self.update_preview,
+            "statistics": self.update_statistics
+        }
+        for view in self.RENDER_VIEWS:
+            if view in stale:
+                renderers[view]()
+
+    def render_now(self, *views):
+        """Refresh views immediately, folding in any pending scheduled render"""
+        if self.render_job is not None:
+            try:
+                self.root.after_cancel(self.render_job)
+            except tk.TclError:
+                pass
+            self.render_job = None
+        self.mark_views_stale(views)
+        self.flush_render()
+
     def update_tab_counts(self):
         """Update tab labels with counts"""
         try:
             # Update Conditions & Goals tab
-            cond_count = len(self.conditions_data)
-            goal_count = len(self.goals_data)
+            cond_count = len(self.quest.conditions)
+            goal_count = len(self.quest.goals)
             self.notebook.tab(1, text=f"🎯 Conditions & Goals (C:{cond_count} G:{goal_count})")
             
             # Update Rewards tab
-            reward_count = len(self.rewards_data)
+            reward_count = len(self.quest.rewards)
             self.notebook.tab(2, text=f"🎁 Rewards ({reward_count})")
         except Exception as e:
             print(f"Warning: Could not update tab counts: {e}")
@@ -948,9 +1220,11 @@ class QuestXMLApp:
     def safe_update_preview(self):
         """Safe wrapper for update_preview"""
         try:
-            self.update_preview()
-            self.status_label.configure(text="XML generated successfully!")
-            self.root.after(3000, lambda: self.status_label.configure(text="Ready to create your quest XML"))
+            self.render_now()
+            # A large quest reports its own status once the worker finishes
+            if self.render_cache.is_current(self.quest):
+                self.status_label.configure(text="XML generated successfully!")
+                self.root.after(3000, lambda: self.status_label.configure(text="Ready to create your quest XML"))
         except Exception as e:
             messagebox.showerror("Preview Error", f"Failed to generate XML preview:\n{str(e)}")
             self.status_label.configure(text="Error generating XML")
@@ -958,7 +1232,7 @@ class QuestXMLApp:
     def safe_detect_lines(self):
         """Detect and highlight lines in XML preview"""
         try:
-            xml_content = self.xml_text.get("1.0", tk.END).strip()
+            xml_content = self.render_cache.preview_text(self.quest).strip()
             if not xml_content:
                 messagebox.showwarning("No Content", "Generate XML first to detect lines.")
                 return
@@ -1005,6 +1279,27 @@ class QuestXMLApp:
         except Exception as e:
             messagebox.showerror("Import Error", f"Failed to import XML:\n{str(e)}")
 
+    def safe_open_from_library(self):
+        """Safe wrapper for open_from_library"""
+        try:
+            self.open_from_library()
+        except Exception as e:
+            messagebox.showerror("Library Error", f"Failed to open quest from library:\n{str(e)}")
+
+    def safe_load_id_tables(self):
+        """Safe wrapper for load_id_tables"""
+        try:
+            self.load_id_tables()
+        except Exception as e:
+            messagebox.showerror("ID Tables Error", f"Failed to load ID tables:\n{str(e)}")
+
+    def safe_allocate_uniq_id(self):
+        """Safe wrapper for allocate_uniq_id"""
+        try:
+            self.allocate_uniq_id()
+        except Exception as e:
+            messagebox.showerror("UniqID Error", f"Failed to allocate UniqID:\n{str(e)}")
+
     def safe_load_sample_data(self):
         """Safe wrapper for load_sample_data"""
         try:
@@ -1029,168 +1324,146 @@ class QuestXMLApp:
     # Core functionality methods (keeping the original logic but compact)
     def get_quest_field_value(self, field_name):
         """Get value from quest field"""
-        try:
-            if field_name not in self.quest_data:
-                return ""
-            
-            widget = self.quest_data[field_name]
-            if isinstance(widget, tk.Text):
-                return widget.get("1.0", tk.END).strip()
-            else:
-                return widget.get().strip()
-        except Exception as e:
-            print(f"Warning: Could not get value for {field_name}: {e}")
-            return ""
+        return self.quest.get_field(field_name)
 
     def generate_xml(self):
         """Generate XML with proper structure"""
-        try:
-            root = ET.Element("QuestInfo")
-            
-            # Add basic fields in correct order
-            basic_field_order = [
-                "UniqID", "Model", "Model2", "Level", "Pos", "Pos2", 
-                "ManagedID", "Active", "Unknown", "Immediate", "ResetQuest", 
-                "Type", "StartTargetType", "StartTargetID", "Target", "TargetValue"
-            ]
-            
-            for field_name in basic_field_order:
-                elem = ET.SubElement(root, field_name)
-                elem.text = self.get_quest_field_value(field_name)
-            
-            # Add text fields in correct order
-            text_field_order = [
-                "TitleTab", "TitleText", "Body", "Simple", 
-                "Helper", "Process", "Complete", "Expert"
-            ]
-            
-            for field_name in text_field_order:
-                elem = ET.SubElement(root, field_name)
-                elem.text = self.get_quest_field_value(field_name)
-            
-            # Add condition count and conditions
-            condition_elem = ET.SubElement(root, "condition")
-            condition_elem.text = str(len(self.conditions_data))
-            
-            if self.conditions_data:
-                quest_conditions = ET.SubElement(root, "QuestConditions")
-                for condition in self.conditions_data:
-                    quest_condition = ET.SubElement(quest_conditions, "QuestCondition")
-                    
-                    cond_type = ET.SubElement(quest_condition, "ConditionType")
-                    cond_type.text = str(condition.get("ConditionType", 0))
-                    
-                    cond_id = ET.SubElement(quest_condition, "ConditionId")
-                    cond_id.text = str(condition.get("ConditionId", 0))
-                    
-                    cond_count = ET.SubElement(quest_condition, "ConditionCount")
-                    cond_count.text = str(condition.get("ConditionCount", 0))
-            
-            # Add goals count and goals
-            goals_elem = ET.SubElement(root, "Goals")
-            goals_elem.text = str(len(self.goals_data))
-            
-            if self.goals_data:
-                quest_goals = ET.SubElement(root, "QuestGoals")
-                for goal in self.goals_data:
-                    quest_goal = ET.SubElement(quest_goals, "QuestGoal")
-                    
-                    goal_type = ET.SubElement(quest_goal, "GoalType")
-                    goal_type.text = str(goal.get("GoalType", 0))
-                    
-                    goal_id = ET.SubElement(quest_goal, "GoalId")
-                    goal_id.text = str(goal.get("GoalId", 0))
-                    
-                    goal_count = ET.SubElement(quest_goal, "GoalCount")
-                    goal_count.text = str(goal.get("GoalCount", 0))
-                    
-                    goal_amount = ET.SubElement(quest_goal, "goalAmount")
-                    goal_amount.text = str(goal.get("goalAmount", 0))
-                    
-                    cur_type_count = ET.SubElement(quest_goal, "CurTypeCount")
-                    cur_type_count.text = str(goal.get("CurTypeCount", 0))
-                    
-                    sub_value = ET.SubElement(quest_goal, "SubValue")
-                    sub_value.text = str(goal.get("SubValue", 0))
-                    
-                    sub_value1 = ET.SubElement(quest_goal, "SubValue1")
-                    sub_value1.text = str(goal.get("SubValue1", 0))
-            
-            # Add reward number and rewards
-            reward_number_elem = ET.SubElement(root, "RewardNumber")
-            reward_number_elem.text = str(len(self.rewards_data))
-            
-            if self.rewards_data:
-                reward_quantities = ET.SubElement(root, "RewardQuantities")
-            
-                for reward in self.rewards_data:
-                    reward_quantity = ET.SubElement(reward_quantities, "RewardQuantity")
-                
-                    reward_elem = ET.SubElement(reward_quantity, "Reward")
-                    reward_elem.text = str(reward.get("Reward", 0))
-                
-                    reward_type = ET.SubElement(reward_quantity, "RewardType")
-                    reward_type.text = str(reward.get("RewardType", 0))
-                
-                    # Handle different reward types
-                    if reward.get("RewardType", 0) == 0:  # Money reward
-                        quest_reward_money = ET.SubElement(reward_quantity, "QuestRewardMoney")
-                        quest_reward_money_item = ET.SubElement(quest_reward_money, "QuestRewardMoneyItem")
-                        reward_money = ET.SubElement(quest_reward_money_item, "RewardMoney")
-                        reward_money.text = str(reward.get("RewardMoney", 0))
-                        reward_unk = ET.SubElement(quest_reward_money_item, "RewardUnk")
-                        reward_unk.text = "0"
-                    
-                        quest_reward_items = ET.SubElement(reward_quantity, "QuestRewardItems")
-                    
-                    else:  # Item reward
-                        quest_reward_money = ET.SubElement(reward_quantity, "QuestRewardMoney")
-                    
-                        quest_reward_items = ET.SubElement(reward_quantity, "QuestRewardItems")
-                        quest_reward_items_item = ET.SubElement(quest_reward_items, "QuestRewardItemsItem")
-                        reward_item = ET.SubElement(quest_reward_items_item, "RewardItem")
-                        reward_item.text = str(reward.get("RewardItem", 0))
-                        reward_amount = ET.SubElement(quest_reward_items_item, "RewardAmount")
-                        reward_amount.text = str(reward.get("RewardAmount", 0))
-        
-            # Add QuestItems and Event sections
-            quest_items = ET.SubElement(root, "QuestItems")
-        
-            event = ET.SubElement(root, "Event")
-            for i in range(4):
-                event_id = ET.SubElement(event, "EventId")
-                event_id.text = "0"
-        
-            return root
-            
-        except Exception as e:
-            raise Exception(f"Failed to generate XML: {str(e)}")
+        return build_quest_element(self.quest)
 
     def update_preview(self):
-        """Update XML preview"""
+        """Update XML preview, patching only the sections that changed
+        
+        Large quests are rendered from a snapshot on a worker thread; any
+        render still in flight is superseded by this request.
+        """
+        # Supersede any background render still in flight
+        self.render_token += 1
         try:
-            xml_tree = self.generate_xml()
-            rough_string = ET.tostring(xml_tree, 'utf-8')
-            reparsed = minidom.parseString(rough_string)
-            pretty_xml = reparsed.toprettyxml(indent="  ")
+            if (not self.render_cache.is_current(self.quest)
+                    and self.quest.row_count() > self.BACKGROUND_RENDER_ROWS):
+                self.start_background_render()
+                return
+        
+            sections = self.render_cache.preview_sections(self.quest)
         
             if hasattr(self, 'xml_text'):
-                self.xml_text.delete(1.0, tk.END)
-                self.xml_text.insert(tk.END, pretty_xml)
-                
-            # Update counts and statistics
-            self.update_auto_counts()
+                self.patch_preview(sections)
         
         except Exception as e:
+            self.show_preview_error(e)
+
+    def show_preview_error(self, error):
+        """Replace the preview with an error message"""
+        if hasattr(self, 'xml_text'):
+            self.xml_text.delete(1.0, tk.END)
+            self.xml_text.insert(tk.END, f"Error generating XML: {str(error)}")
+            self.preview_sections = None
+        print(f"XML Preview Error: {error}")
+
+    def start_background_render(self):
+        """Render a snapshot of the quest on a worker thread"""
+        token = self.render_token
+        snapshot = self.quest.snapshot()
+        self.status_label.configure(text="Generating XML...")
+        worker = threading.Thread(target=self.render_worker, args=(token, snapshot), daemon=True)
+        worker.start()
+        self.render_pending += 1
+        if self.render_pending == 1:
+            self.root.after(self.RENDER_POLL_MS, self.poll_background_render)
+
+    def render_worker(self, token, snapshot):
+        """Worker thread: render snapshot sections unless a newer request supersedes it"""
+        try:
+            sections = []
+            for i, section in enumerate(iter_quest_xml(snapshot, "")):
+                if i % self.RENDER_CANCEL_CHECK == 0 and token != self.render_token:
+                    sections = None  # Cancelled by a newer edit
+                    break
+                sections.append(section)
+            result, error = sections, None
+        except Exception as e:
+            result, error = None, e
+        self.render_results.put((token, snapshot.version, result, error))
+
+    def poll_background_render(self):
+        """Main thread: apply queued background renders, polling until none is outstanding"""
+        try:
+            while True:
+                token, version, sections, error = self.render_results.get_nowait()
+                self.render_pending -= 1
+                self.finish_background_render(token, version, sections, error)
+        except queue.Empty:
+            pass
+        if self.render_pending:
+            self.root.after(self.RENDER_POLL_MS, self.poll_background_render)
+
+    def finish_background_render(self, token, version, sections, error):
+        """Main thread: apply a background render if it is still the newest"""
+        if token != self.render_token or version != self.quest.version:
+            return  # Stale render, a newer one is on its way
+        if error is not None:
+            self.show_preview_error(error)
+            self.status_label.configure(text="Error generating XML")
+            return
+        try:
+            self.render_cache.store(self.quest, version, sections)
             if hasattr(self, 'xml_text'):
-                self.xml_text.delete(1.0, tk.END)
-                self.xml_text.insert(tk.END, f"Error generating XML: {str(e)}")
-            print(f"XML Preview Error: {e}")
+                self.patch_preview(self.render_cache.preview_sections(self.quest))
+            self.update_statistics()
+            self.status_label.configure(text="XML generated successfully!")
+            self.root.after(3000, lambda: self.status_label.configure(text="Ready to create your quest XML"))
+        except Exception as e:
+            self.show_preview_error(e)
+
+    def patch_preview(self, sections):
+        """Bring xml_text in line with sections by replacing only changed line ranges
+        
+        preview_sections mirrors what the widget shows, one entry per
+        serializer section (whole lines each). If the widget was edited by
+        hand or shows an error, it is rewritten in full instead.
+        """
+        old = self.preview_sections
+        if old is None or self.xml_text.edit_modified():
+            self.xml_text.delete(1.0, tk.END)
+            self.xml_text.insert(tk.END, "".join(sections))
+        else:
+            # Trim the unchanged head and tail before diffing the middle
+            head = 0
+            limit = min(len(old), len(sections))
+            while head < limit and old[head] == sections[head]:
+                head += 1
+            tail = 0
+            while tail < limit - head and old[-1 - tail] == sections[-1 - tail]:
+                tail += 1
+            old_mid = old[head:len(old) - tail]
+            new_mid = sections[head:len(sections) - tail]
+        
+            if old_mid or new_mid:
+                # First widget line (1-based) of every old section in the middle
+                line = 1 + sum(section.count("\n") for section in old[:head])
+                starts = [line]
+                for section in old_mid:
+                    line += section.count("\n")
+                    starts.append(line)
+        
+                matcher = difflib.SequenceMatcher(None, old_mid, new_mid, autojunk=False)
+                # Apply bottom-up so earlier line numbers stay valid
+                for tag, i1, i2, j1, j2 in reversed(matcher.get_opcodes()):
+                    if tag == "equal":
+                        continue
+                    start = f"{starts[i1]}.0"
+                    if i2 > i1:
+                        self.xml_text.delete(start, f"{starts[i2]}.0")
+                    if j2 > j1:
+                        self.xml_text.insert(start, "".join(new_mid[j1:j2]))
+        
+        self.xml_text.edit_modified(False)
+        self.preview_sections = sections
 
     def copy_xml_to_clipboard(self):
         """Copy XML content to clipboard"""
         try:
-            xml_content = self.xml_text.get("1.0", tk.END).strip()
+            xml_content = self.render_cache.preview_text(self.quest).strip()
             if xml_content:
                 self.root.clipboard_clear()
                 self.root.clipboard_append(xml_content)
@@ -1204,27 +1477,26 @@ class QuestXMLApp:
     def save_xml(self):
         """Save XML to file"""
         try:
-            quest_id = self.get_quest_field_value("UniqID")
-            title = self.get_quest_field_value("TitleTab").replace(" ", "_").replace("/", "_").replace("\\", "_")
-            default_filename = f"Quest_{quest_id}_{title}.xml"
+            quest_id = self.quest.UniqID
+            default_filename = self.quest.file_name()
+            
+            if self.library_index is not None:
+                collisions = find_collisions([self.quest], self.library_index)
+                if collisions and not messagebox.askyesno(
+                        "Duplicate UniqID",
+                        f"⚠️ UniqID {quest_id} sudah dipakai:\n{collisions[0][1]}\n\nTetap simpan?",
+                        icon='warning'):
+                    return
 
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xml",
-                initialname=default_filename,
+                initialfile=default_filename,
                 filetypes=[("XML files", "*.xml"), ("All files", "*.*")],
                 title="Save Quest XML File"
             )
 
             if file_path:
-                xml_tree = self.generate_xml()
-                rough_string = ET.tostring(xml_tree, 'utf-8')
-                reparsed = minidom.parseString(rough_string)
-                pretty_xml = reparsed.toprettyxml(indent="  ", encoding=None)
-
-                with open(file_path, 'w', encoding='utf-8', newline='') as f:
-                    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-                    lines = pretty_xml.split('\n')[1:]
-                    f.write('\n'.join(lines))
+                write_quest_bytes(self.render_cache.file_bytes(self.quest), file_path)
 
                 file_size = os.path.getsize(file_path)
                 messagebox.showinfo("Save Berhasil", 
@@ -1244,36 +1516,19 @@ class QuestXMLApp:
                                   icon='warning'):
 
                 # Reset all fields to defaults
-                all_fields = self.basic_fields + self.text_fields
-                for field_name, default_value in all_fields:
-                    if field_name in self.quest_data:
-                        widget = self.quest_data[field_name]
-                        if isinstance(widget, tk.Text):
-                            widget.delete("1.0", tk.END)
-                            widget.insert("1.0", default_value)
-                        else:
-                            widget.delete(0, tk.END)
-                            widget.insert(0, default_value)
+                self.quest.reset_fields()
+                self.refresh_quest_fields()
 
                 # Clear all data lists
-                self.conditions_data.clear()
-                self.goals_data.clear()
-                self.rewards_data.clear()
+                self.quest.conditions.clear()
+                self.quest.goals.clear()
+                self.quest.rewards.clear()
+                self.quest.passthrough = {}
 
                 # Clear all treeviews
-                if hasattr(self, 'cond_tree'):
-                    for item in self.cond_tree.get_children():
-                        self.cond_tree.delete(item)
-                if hasattr(self, 'goal_tree'):
-                    for item in self.goal_tree.get_children():
-                        self.goal_tree.delete(item)
-                if hasattr(self, 'reward_tree'):
-                    for item in self.reward_tree.get_children():
-                        self.reward_tree.delete(item)
-
-                self.update_auto_counts()
-                self.update_tab_counts()
-                self.update_preview()
+                self.refresh_all_treeviews()
+
+                self.quest_changed()
                 messagebox.showinfo("Clear Berhasil", "Semua data berhasil dihapus dan direset ke default.")
         except Exception as e:
             raise Exception(f"Failed to clear data: {str(e)}")
@@ -1285,79 +1540,29 @@ class QuestXMLApp:
                                   "Apakah Anda yakin ingin memuat sample data?\nData yang ada akan diganti.",
                                   icon='question'):
                 
-                # Clear existing data first
-                self.conditions_data.clear()
-                self.goals_data.clear()
-                self.rewards_data.clear()
-                
                 # Load sample data
-                sample_conditions = [
-                    {"ConditionType": 1, "ConditionId": 30, "ConditionCount": 0},
-                    {"ConditionType": 3, "ConditionId": 44, "ConditionCount": 0}
-                ]
-                
-                sample_goals = [
-                    {
-                        "GoalType": 4,
-                        "GoalId": 93609,
-                        "GoalCount": 0,
-                        "goalAmount": 1,
-                        "CurTypeCount": 0,
-                        "SubValue": 0,
-                        "SubValue1": 0
-                    }
-                ]
-                
-                sample_rewards = [
-                    {"Reward": 0, "RewardType": 0, "RewardMoney": 800, "RewardItem": 0, "RewardAmount": 0},
-                    {"Reward": 0, "RewardType": 1, "RewardMoney": 0, "RewardItem": 400000, "RewardAmount": 0}
-                ]
-                
-                # Add sample data
-                self.conditions_data.extend(sample_conditions)
-                self.goals_data.extend(sample_goals)
-                self.rewards_data.extend(sample_rewards)
+                self.quest.conditions = sample_conditions()
+                self.quest.goals = sample_goals()
+                self.quest.rewards = sample_rewards()
                 
                 # Update displays
                 self.refresh_all_treeviews()
-                self.update_auto_counts()
-                self.update_tab_counts()
-                self.update_preview()
+                self.quest_changed()
                 
                 messagebox.showinfo("Sample Data Loaded", 
                                   f"✅ Sample data berhasil dimuat!\n\n"
-                                  f"📊 Conditions: {len(self.conditions_data)}\n"
-                                  f"🎯 Goals: {len(self.goals_data)}\n"
-                                  f"🎁 Rewards: {len(self.rewards_data)}")
+                                  f"📊 Conditions: {len(self.quest.conditions)}\n"
+                                  f"🎯 Goals: {len(self.quest.goals)}\n"
+                                  f"🎁 Rewards: {len(self.quest.rewards)}")
         except Exception as e:
             raise Exception(f"Failed to load sample data: {str(e)}")
 
     def refresh_all_treeviews(self):
-        """Refresh all treeview displays"""
+        """Refresh all treeview displays (constant cost: visible rows only)"""
         try:
-            # Clear all treeviews
-            if hasattr(self, 'cond_tree'):
-                for item in self.cond_tree.get_children():
-                    self.cond_tree.delete(item)
-            if hasattr(self, 'goal_tree'):
-                for item in self.goal_tree.get_children():
-                    self.goal_tree.delete(item)
-            if hasattr(self, 'reward_tree'):
-                for item in self.reward_tree.get_children():
-                    self.reward_tree.delete(item)
-            
-            # Repopulate treeviews
-            if hasattr(self, 'cond_tree'):
-                for condition in self.conditions_data:
-                    self.cond_tree.insert("", tk.END, values=tuple(condition.values()))
-            
-            if hasattr(self, 'goal_tree'):
-                for goal in self.goals_data:
-                    self.goal_tree.insert("", tk.END, values=tuple(goal.values()))
-            
-            if hasattr(self, 'reward_tree'):
-                for reward in self.rewards_data:
-                    self.reward_tree.insert("", tk.END, values=tuple(reward.values()))
+            for name in ('cond_tree', 'goal_tree', 'reward_tree'):
+                if hasattr(self, name):
+                    getattr(self, name).reset()
         except Exception as e:
             print(f"Warning: Could not refresh treeviews: {e}")
 
@@ -1376,118 +1581,152 @@ class QuestXMLApp:
                 messagebox.showerror("File Error", "Selected file does not exist.")
                 return
             
-            # Parse XML file
-            tree = ET.parse(file_path)
-            root = tree.getroot()
+            # Stream the file once to list its quests (also validates it)
+            quests = list_quests(file_path)
+            if not quests:
+                messagebox.showerror("File Error", "No QuestInfo found in the selected file.")
+                return
+            
+            uniq_id = None
+            if len(quests) > 1:
+                # Multi-quest dump: choose which quest to load
+                first_ids = ", ".join(uid for _, uid, _ in quests[:5])
+                uniq_id = simpledialog.askstring(
+                    "Select Quest",
+                    f"File berisi {len(quests)} quest.\nMasukkan UniqID yang akan diimport:\n({first_ids}{', ...' if len(quests) > 5 else ''})",
+                    initialvalue=quests[0][1], parent=self.root)
+                if not uniq_id:
+                    return
+                uniq_id = uniq_id.strip()
+                if uniq_id not in {uid for _, uid, _ in quests}:
+                    messagebox.showerror("Import Error", f"Quest {uniq_id} not found in file.")
+                    return
             
             if messagebox.askyesno("Import XML", 
                                   "Apakah Anda yakin ingin mengimport XML?\nData yang ada akan diganti.",
                                   icon='question'):
                 
-                # Clear existing data
-                self.conditions_data.clear()
-                self.goals_data.clear()
-                self.rewards_data.clear()
-                
-                # Import basic fields
-                for field_name, _ in self.basic_fields:
-                    elem = root.find(field_name)
-                    if elem is not None and elem.text and field_name in self.quest_data:
-                        widget = self.quest_data[field_name]
-                        if isinstance(widget, tk.Text):
-                            widget.delete("1.0", tk.END)
-                            widget.insert("1.0", elem.text)
-                        else:
-                            widget.delete(0, tk.END)
-                            widget.insert(0, elem.text)
-                
-                # Import text fields
-                for field_name, _ in self.text_fields:
-                    elem = root.find(field_name)
-                    if elem is not None and elem.text and field_name in self.quest_data:
-                        widget = self.quest_data[field_name]
-                        widget.delete("1.0", tk.END)
-                        widget.insert("1.0", elem.text)
-                
-                # Import conditions
-                quest_conditions = root.find("QuestConditions")
-                if quest_conditions is not None:
-                    for quest_condition in quest_conditions.findall("QuestCondition"):
-                        condition_data = {}
-                        for field in ["ConditionType", "ConditionId", "ConditionCount"]:
-                            elem = quest_condition.find(field)
-                            condition_data[field] = int(elem.text) if elem is not None and elem.text else 0
-                        self.conditions_data.append(condition_data)
-                
-                # Import goals
-                quest_goals = root.find("QuestGoals")
-                if quest_goals is not None:
-                    for quest_goal in quest_goals.findall("QuestGoal"):
-                        goal_data = {}
-                        for field in ["GoalType", "GoalId", "GoalCount", "goalAmount", "CurTypeCount", "SubValue", "SubValue1"]:
-                            elem = quest_goal.find(field)
-                            goal_data[field] = int(elem.text) if elem is not None and elem.text else 0
-                        self.goals_data.append(goal_data)
-                
-                # Import rewards
-                reward_quantities = root.find("RewardQuantities")
-                if reward_quantities is not None:
-                    for reward_quantity in reward_quantities.findall("RewardQuantity"):
-                        reward_data = {"Reward": 0, "RewardType": 0, "RewardMoney": 0, "RewardItem": 0, "RewardAmount": 0}
-                        
-                        # Get basic reward info
-                        reward_elem = reward_quantity.find("Reward")
-                        if reward_elem is not None and reward_elem.text:
-                            reward_data["Reward"] = int(reward_elem.text)
-                        
-                        reward_type_elem = reward_quantity.find("RewardType")
-                        if reward_type_elem is not None and reward_type_elem.text:
-                            reward_data["RewardType"] = int(reward_type_elem.text)
-                        
-                        # Get money reward
-                        quest_reward_money = reward_quantity.find("QuestRewardMoney")
-                        if quest_reward_money is not None:
-                            money_item = quest_reward_money.find("QuestRewardMoneyItem")
-                            if money_item is not None:
-                                money_elem = money_item.find("RewardMoney")
-                                if money_elem is not None and money_elem.text:
-                                    reward_data["RewardMoney"] = int(money_elem.text)
-                        
-                        # Get item reward
-                        quest_reward_items = reward_quantity.find("QuestRewardItems")
-                        if quest_reward_items is not None:
-                            items_item = quest_reward_items.find("QuestRewardItemsItem")
-                            if items_item is not None:
-                                item_elem = items_item.find("RewardItem")
-                                amount_elem = items_item.find("RewardAmount")
-                                if item_elem is not None and item_elem.text:
-                                    reward_data["RewardItem"] = int(item_elem.text)
-                                if amount_elem is not None and amount_elem.text:
-                                    reward_data["RewardAmount"] = int(amount_elem.text)
-                        
-                        self.rewards_data.append(reward_data)
+                # Load fields and rows into the quest model
+                load_quest(file_path, uniq_id=uniq_id, quest=self.quest)
+                self.refresh_quest_fields()
                 
                 # Refresh displays
                 self.refresh_all_treeviews()
-                self.update_auto_counts()
-                self.update_tab_counts()
-                self.update_preview()
+                self.quest_changed()
                 
                 messagebox.showinfo("Import Berhasil", 
                                   f"✅ XML berhasil diimport!\n\n"
                                   f"📁 File: {os.path.basename(file_path)}\n"
-                                  f"📊 Conditions: {len(self.conditions_data)}\n"
-                                  f"🎯 Goals: {len(self.goals_data)}\n"
-                                  f"🎁 Rewards: {len(self.rewards_data)}")
+                                  f"📊 Conditions: {len(self.quest.conditions)}\n"
+                                  f"🎯 Goals: {len(self.quest.goals)}\n"
+                                  f"🎁 Rewards: {len(self.quest.rewards)}")
         
         except ET.ParseError as e:
             messagebox.showerror("XML Parse Error", f"❌ Invalid XML file:\n{str(e)}")
         except Exception as e:
             raise Exception(f"Failed to import XML: {str(e)}")
 
+    def ensure_library_index(self):
+        """Open (asking for the folder once) and refresh the library index; None if cancelled"""
+        if self.library_index is None:
+            directory = filedialog.askdirectory(title="Select Quest Library Folder")
+            if not directory:
+                return None
+            self.library_index = QuestLibraryIndex(directory)
+        
+        # Incremental: only new or changed files are parsed
+        self.status_label.configure(text="Updating library index...")
+        self.root.update_idletasks()
+        stats = self.library_index.scan()
+        self.status_label.configure(text=f"Library: {self.library_index.count()} quests indexed "
+                                         f"({stats['updated']} updated)")
+        return self.library_index
+
+    def open_from_library(self):
+        """Open a quest by UniqID through the library index"""
+        try:
+            if self.ensure_library_index() is None:
+                return
+            
+            uniq_id = simpledialog.askstring("Open Quest",
+                                             f"Masukkan UniqID ({self.library_index.count()} quest di library):",
+                                             parent=self.root)
+            if not uniq_id:
+                return
+            
+            rows = self.library_index.find(uniq_id.strip())
+            if not rows:
+                messagebox.showwarning("Not Found", f"Quest {uniq_id} tidak ditemukan di library.")
+                return
+            
+            if messagebox.askyesno("Open Quest", 
+                                  f"Buka quest {uniq_id} ({rows[0]['title_tab']})?\nData yang ada akan diganti.",
+                                  icon='question'):
+                self.library_index.load(uniq_id.strip(), quest=self.quest)
+                self.refresh_quest_fields()
+                self.refresh_all_treeviews()
+                self.quest_changed()
+                
+                if len(rows) > 1:
+                    messagebox.showwarning("Duplicate UniqID",
+                                           f"⚠️ UniqID {uniq_id} ada di {len(rows)} file. Dibuka:\n{rows[0]['path']}")
+        except Exception as e:
+            raise Exception(f"Failed to open quest from library: {str(e)}")
+
+    def load_id_tables(self):
+        """Load item/NPC/monster/map ID tables for live reference checks"""
+        try:
+            directory = filedialog.askdirectory(title="Select ID Tables Folder (items/npcs/monsters/maps .csv or .xml)")
+            if not directory:
+                return
+            tables = find_id_tables(directory)
+            if not tables:
+                messagebox.showwarning("No ID Tables",
+                                       f"No {', '.join(ID_TABLE_NAMES)} table (.csv / .xml) found in:\n{directory}")
+                return
+            
+            self.xref_index = load_id_tables(directory)
+            for field_name in self.quest_data:
+                self.check_field_reference(field_name)
+            
+            problems = self.xref_index.check_quest(self.quest)
+            summary = ", ".join(f"{name}: {len(table)}" for name, table in self.xref_index.tables.items())
+            self.status_label.configure(text=f"ID tables loaded ({summary}); {len(problems)} unknown IDs in this quest")
+            if self.xref_index.cache_error:
+                messagebox.showwarning("ID Table Cache", self.xref_index.cache_error)
+            if problems:
+                messagebox.showwarning("Unknown IDs", "\n".join(problems[:20]))
+        except Exception as e:
+            raise Exception(f"Failed to load ID tables: {str(e)}")
+
+    def allocate_uniq_id(self):
+        """Give the quest the next free UniqID from the library's configured range"""
+        try:
+            index = self.ensure_library_index()
+            if index is None:
+                return
+            
+            id_range = None
+            if not index.get_setting(ID_RANGE_SETTING):
+                id_range = simpledialog.askstring("UniqID Range",
+                                                  "Range UniqID untuk library ini (contoh: 3000-3999):",
+                                                  parent=self.root)
+                if not id_range:
+                    return
+            allocator = IdAllocator.from_index(index, id_range)
+            uniq_id = allocator.allocate()[0]
+            
+            self.quest.set_field("UniqID", str(uniq_id))
+            self.refresh_quest_fields()
+            self.quest_changed()
+            self.status_label.configure(text=f"🆔 UniqID {uniq_id} assigned "
+                                             f"({allocator.free_count()} free in {allocator.low}-{allocator.high})")
+        except Exception as e:
+            raise Exception(f"Failed to allocate UniqID: {str(e)}")
+
     # Popup methods for adding/editing data
-    def open_popup(self, title, fields, callback, values=None):
-        """Create compact popup dialog"""
+    def open_popup(self, title, section, callback, values=None):
+        """Create compact popup dialog editing one row of a QUEST_SECTIONS section"""
         try:
             popup = tk.Toplevel(self.root)
             popup.title(title)
@@ -1518,12 +1757,12 @@ class QuestXMLApp:
             popup.protocol("WM_DELETE_WINDOW", cleanup_popup)
             
             # Create popup content
-            self.create_compact_popup_content(popup, title, fields, callback, values, cleanup_popup)
+            self.create_compact_popup_content(popup, title, section, callback, values, cleanup_popup)
             
         except Exception as e:
             messagebox.showerror("Popup Error", f"Failed to create popup:\n{str(e)}")
 
-    def create_compact_popup_content(self, popup, title, fields, callback, values, cleanup_func):
+    def create_compact_popup_content(self, popup, title, section, callback, values, cleanup_func):
         """Create compact popup content"""
         try:
             # Compact header
@@ -1563,7 +1802,7 @@ class QuestXMLApp:
         
             # Create compact form fields
             entries = {}
-            for i, field in enumerate(fields):
+            for i, field in enumerate(section.columns):
                 field_frame = tk.Frame(main_frame, bg=self.colors['card'])
                 field_frame.pack(fill=tk.X, pady=4, padx=15)
             
@@ -1613,19 +1852,15 @@ class QuestXMLApp:
                                            parent=popup)
                             return
             
-                    # Validate reward data logic
-                    if "RewardType" in data:
-                        reward_type = data["RewardType"]
-                        if reward_type == 0 and data.get("RewardMoney", 0) == 0:
-                            if not messagebox.askyesno("Validation Warning", 
-                                                 "RewardType is 0 (Money) but RewardMoney is 0.\nContinue anyway?",
-                                                 parent=popup):
-                                return
-                        elif reward_type in [1, 2] and data.get("RewardItem", 0) == 0:
-                            if not messagebox.askyesno("Validation Warning", 
-                                                 "RewardType is for items but RewardItem is 0.\nContinue anyway?",
-                                                 parent=popup):
-                                return
+                    # Validate reward data logic (the other rules run in batch validation only)
+                    messages = check_row(section.attr, data, EDITOR_RULES)
+                    if self.xref_index is not None:
+                        messages += self.xref_index.check_row(section.attr, data)
+                    for message in messages:
+                        if not messagebox.askyesno("Validation Warning", 
+                                             f"{message}\nContinue anyway?",
+                                             parent=popup):
+                            return
                 
                     cleanup_func()
                     callback(data)
@@ -1661,55 +1896,51 @@ class QuestXMLApp:
     def add_condition_popup(self):
         try:
             self.open_popup("Add Condition", 
-                           ["ConditionType", "ConditionId", "ConditionCount"], 
+                           QUEST_SECTIONS["conditions"], 
                            self.add_condition)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open condition popup:\n{str(e)}")
 
     def edit_condition_popup(self):
         try:
-            selected = self.cond_tree.selection()
+            selected = self.cond_tree.selected_indices()
             if not selected:
                 messagebox.showwarning("No Selection", "Please select a condition to edit.")
                 return
             
-            item = selected[0]
-            idx = self.cond_tree.index(item)
-            if 0 <= idx < len(self.conditions_data):
+            idx = selected[0]
+            if 0 <= idx < len(self.quest.conditions):
                 self.open_popup("Edit Condition", 
-                               ["ConditionType", "ConditionId", "ConditionCount"], 
+                               QUEST_SECTIONS["conditions"], 
                                lambda data: self.edit_condition_data(data, idx), 
-                               self.conditions_data[idx])
+                               self.quest.conditions[idx].to_dict())
         except Exception as e:
             messagebox.showerror("Error", f"Failed to edit condition:\n{str(e)}")
 
     def edit_condition_data(self, data, idx):
         try:
-            if 0 <= idx < len(self.conditions_data):
-                self.conditions_data[idx] = data
-                children = self.cond_tree.get_children()
-                if idx < len(children):
-                    item = children[idx]
-                    self.cond_tree.item(item, values=tuple(data.values()))
-                self.update_auto_counts()
-                self.update_tab_counts()
-                self.update_preview()
+            if 0 <= idx < len(self.quest.conditions):
+                row = QuestCondition.from_dict(data)
+                # Keep unknown elements the imported condition carried
+                row.passthrough = QUEST_SECTIONS["conditions"].carried_passthrough(self.quest.conditions[idx], row)
+                self.quest.conditions[idx] = row
+                self.cond_tree.refresh_row(idx)
+                self.quest_changed()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update condition:\n{str(e)}")
 
     def add_condition(self, data):
         try:
-            self.conditions_data.append(data)
-            self.cond_tree.insert("", tk.END, values=tuple(data.values()))
-            self.update_auto_counts()
-            self.update_tab_counts()
-            self.update_preview()
+            row = QuestCondition.from_dict(data)
+            self.quest.conditions.append(row)
+            self.cond_tree.see(len(self.quest.conditions) - 1)
+            self.quest_changed()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add condition:\n{str(e)}")
 
     def delete_condition(self): 
         try:
-            self.delete_data(self.conditions_data, self.cond_tree, "condition")
+            self.delete_data("conditions", self.cond_tree, "condition")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete condition:\n{str(e)}")
 
@@ -1717,55 +1948,51 @@ class QuestXMLApp:
     def add_goal_popup(self):
         try:
             self.open_popup("Add Goal", 
-                           ["GoalType", "GoalId", "GoalCount", "goalAmount", "CurTypeCount", "SubValue", "SubValue1"], 
+                           QUEST_SECTIONS["goals"], 
                            self.add_goal)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open goal popup:\n{str(e)}")
 
     def edit_goal_popup(self):
         try:
-            selected = self.goal_tree.selection()
+            selected = self.goal_tree.selected_indices()
             if not selected:
                 messagebox.showwarning("No Selection", "Please select a goal to edit.")
                 return
             
-            item = selected[0]
-            idx = self.goal_tree.index(item)
-            if 0 <= idx < len(self.goals_data):
+            idx = selected[0]
+            if 0 <= idx < len(self.quest.goals):
                 self.open_popup("Edit Goal", 
-                               ["GoalType", "GoalId", "GoalCount", "goalAmount", "CurTypeCount", "SubValue", "SubValue1"], 
+                               QUEST_SECTIONS["goals"], 
                                lambda data: self.edit_goal_data(data, idx), 
-                               self.goals_data[idx])
+                               self.quest.goals[idx].to_dict())
         except Exception as e:
             messagebox.showerror("Error", f"Failed to edit goal:\n{str(e)}")
 
     def edit_goal_data(self, data, idx):
         try:
-            if 0 <= idx < len(self.goals_data):
-                self.goals_data[idx] = data
-                children = self.goal_tree.get_children()
-                if idx < len(children):
-                    item = children[idx]
-                    self.goal_tree.item(item, values=tuple(data.values()))
-                self.update_auto_counts()
-                self.update_tab_counts()
-                self.update_preview()
+            if 0 <= idx < len(self.quest.goals):
+                row = QuestGoal.from_dict(data)
+                # Keep unknown elements the imported goal carried
+                row.passthrough = QUEST_SECTIONS["goals"].carried_passthrough(self.quest.goals[idx], row)
+                self.quest.goals[idx] = row
+                self.goal_tree.refresh_row(idx)
+                self.quest_changed()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update goal:\n{str(e)}")
 
     def add_goal(self, data):
         try:
-            self.goals_data.append(data)
-            self.goal_tree.insert("", tk.END, values=tuple(data.values()))
-            self.update_auto_counts()
-            self.update_tab_counts()
-            self.update_preview()
+            row = QuestGoal.from_dict(data)
+            self.quest.goals.append(row)
+            self.goal_tree.see(len(self.quest.goals) - 1)
+            self.quest_changed()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add goal:\n{str(e)}")
 
     def delete_goal(self): 
         try:
-            self.delete_data(self.goals_data, self.goal_tree, "goal")
+            self.delete_data("goals", self.goal_tree, "goal")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete goal:\n{str(e)}")
 
@@ -1773,81 +2000,169 @@ class QuestXMLApp:
     def add_reward_popup(self):
         try:
             self.open_popup("Add Reward", 
-                           ["Reward", "RewardType", "RewardMoney", "RewardItem", "RewardAmount"], 
+                           QUEST_SECTIONS["rewards"], 
                            self.add_reward)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to open reward popup:\n{str(e)}")
 
     def edit_reward_popup(self):
         try:
-            selected = self.reward_tree.selection()
+            selected = self.reward_tree.selected_indices()
             if not selected:
                 messagebox.showwarning("No Selection", "Please select a reward to edit.")
                 return
             
-            item = selected[0]
-            idx = self.reward_tree.index(item)
-            if 0 <= idx < len(self.rewards_data):
+            idx = selected[0]
+            if 0 <= idx < len(self.quest.rewards):
                 self.open_popup("Edit Reward", 
-                               ["Reward", "RewardType", "RewardMoney", "RewardItem", "RewardAmount"], 
+                               QUEST_SECTIONS["rewards"], 
                                lambda data: self.edit_reward_data(data, idx), 
-                               self.rewards_data[idx])
+                               self.quest.rewards[idx].to_dict())
         except Exception as e:
             messagebox.showerror("Error", f"Failed to edit reward popup:\n{str(e)}")
 
     def edit_reward_data(self, data, idx):
         try:
-            if 0 <= idx < len(self.rewards_data):
-                self.rewards_data[idx] = data
-                children = self.reward_tree.get_children()
-                if idx < len(children):
-                    item = children[idx]
-                    self.reward_tree.item(item, values=tuple(data.values()))
-                self.update_auto_counts()
-                self.update_tab_counts()
-                self.update_preview()
+            if 0 <= idx < len(self.quest.rewards):
+                row = RewardQuantity.from_dict(data)
+                # Keep the imported reward's RewardUnk and other source XML that
+                # still fits; a new RewardType drops what belonged to the old layout
+                row.passthrough = QUEST_SECTIONS["rewards"].carried_passthrough(self.quest.rewards[idx], row)
+                self.quest.rewards[idx] = row
+                self.reward_tree.refresh_row(idx)
+                self.quest_changed()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update reward:\n{str(e)}")
 
     def add_reward(self, data):
         try:
-            self.rewards_data.append(data)
-            self.reward_tree.insert("", tk.END, values=tuple(data.values()))
-            self.update_auto_counts()
-            self.update_tab_counts()
-            self.update_preview()
+            row = RewardQuantity.from_dict(data)
+            self.quest.rewards.append(row)
+            self.reward_tree.see(len(self.quest.rewards) - 1)
+            self.quest_changed()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to add reward:\n{str(e)}")
 
     def delete_reward(self): 
         try:
-            self.delete_data(self.rewards_data, self.reward_tree, "reward")
+            self.delete_data("rewards", self.reward_tree, "reward")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete reward:\n{str(e)}")
 
-    def delete_data(self, data_list, treeview, item_type):
-        """Delete data with confirmation"""
+    # Batch operations: one model change and one re-render per batch
+    def delete_data(self, section, treeview, item_type):
+        """Delete all selected rows with a single confirmation"""
         try:
-            selected = treeview.selection()
+            selected = treeview.selected_indices()
             if not selected:
                 messagebox.showwarning("No Selection", f"Please select a {item_type} to delete.")
                 return
             
+            what = f"this {item_type}" if len(selected) == 1 else f"these {len(selected)} {item_type}s"
             if messagebox.askyesno("Confirm Delete", 
-                                  f"Are you sure you want to delete this {item_type}?",
+                                  f"Are you sure you want to delete {what}?",
                                   icon='warning'):
-                idx = treeview.index(selected[0])
-                if 0 <= idx < len(data_list):
-                    del data_list[idx]
-                    treeview.delete(selected[0])
-                    self.update_auto_counts()
-                    self.update_tab_counts()
-                    self.update_preview()
+                if self.quest.delete_rows(section, selected):
+                    treeview.select(())
+                    self.schedule_render()
         except Exception as e:
             raise Exception(f"Failed to delete {item_type}: {str(e)}")
 
+    def duplicate_data(self, section, treeview, item_type):
+        """Duplicate all selected rows after the last selected one"""
+        selected = treeview.selected_indices()
+        if not selected:
+            messagebox.showwarning("No Selection", f"Please select a {item_type} to duplicate.")
+            return
+        
+        new_indices = self.quest.duplicate_rows(section, selected)
+        treeview.select(new_indices)
+        treeview.see(new_indices[-1])
+        self.schedule_render()
+
+    def bulk_edit_data(self, section, treeview, item_type, headers):
+        """Set one column to the same value on every selected row"""
+        selected = treeview.selected_indices()
+        if not selected:
+            messagebox.showwarning("No Selection", f"Please select the {item_type}s to edit.")
+            return
+        
+        field_name = simpledialog.askstring(
+            "Set Column", f"Kolom yang akan diubah untuk {len(selected)} {item_type}:\n{', '.join(headers)}",
+            initialvalue=headers[0], parent=self.root)
+        if not field_name:
+            return
+        field_name = field_name.strip()
+        if field_name not in headers:
+            messagebox.showerror("Invalid Column", f"Unknown column '{field_name}'.\nChoose one of: {', '.join(headers)}")
+            return
+        
+        value = simpledialog.askinteger("Set Column", f"Nilai baru untuk {field_name}:", parent=self.root)
+        if value is None:
+            return
+        
+        if self.quest.set_column(section, selected, field_name, value):
+            treeview.refresh()
+            self.schedule_render()
+
+    def copy_rows(self, section, treeview):
+        """Copy the selected rows to the clipboard as tab-separated values"""
+        rows = self.quest.section_rows(section)
+        lines = ["\t".join(map(str, rows[index].values())) for index in treeview.selected_indices()]
+        if lines:
+            self.root.clipboard_clear()
+            self.root.clipboard_append("\n".join(lines))
+            self.status_label.configure(text=f"Copied {len(lines)} rows")
+
+    def paste_rows(self, section, treeview, item_type):
+        """Insert rows from clipboard text (tab, comma or space separated) after the selection"""
+        try:
+            text = self.root.clipboard_get()
+        except tk.TclError:
+            messagebox.showwarning("Empty Clipboard", "Clipboard tidak berisi data.")
+            return
+        
+        row_class = ROW_TYPES[section]
+        width = len(row_class.field_names())
+        rows, errors = [], []
+        for line_no, line in enumerate(text.splitlines(), 1):
+            cells = line.replace(",", " ").split()
+            if not cells:
+                continue
+            try:
+                values = [int(cell) for cell in cells]
+            except ValueError:
+                if line_no == 1:
+                    continue  # Header row copied from a spreadsheet
+                errors.append(f"line {line_no}: not all integers")
+                continue
+            if len(values) != width:
+                errors.append(f"line {line_no}: expected {width} values, got {len(values)}")
+                continue
+            rows.append(row_class(*values))
+        
+        if errors:
+            messagebox.showerror("Paste Error", "Tidak ada yang di-paste:\n" + "\n".join(errors[:10]))
+            return
+        if not rows:
+            messagebox.showwarning("Nothing to Paste", f"Clipboard tidak berisi {item_type} ({width} kolom angka).")
+            return
+        
+        selected = treeview.selected_indices()
+        new_indices = self.quest.insert_rows(section, rows, selected[-1] + 1 if selected else None)
+        treeview.select(new_indices)
+        treeview.see(new_indices[-1])
+        self.schedule_render()
+        self.status_label.configure(text=f"Pasted {len(rows)} {item_type}s")
+
 def main():
     """Main function to run the compact application"""
+    if len(sys.argv) > 1 and sys.argv[1] in quest_cli.COMMANDS + ("-h", "--help"):
+        sys.exit(quest_cli.main(sys.argv[1:]))
+    if tk is None:
+        print("tkinter is not available; use one of the batch commands:", ", ".join(quest_cli.COMMANDS))
+        sys.exit(2)
+
     try:
         root = tk.Tk()
         app = QuestXMLApp(root)
@@ -0,0 +1,226 @@
+"""Cross-reference checks of quest IDs against the game's item/NPC/monster/map tables
+
+ID tables are CSV or XML dumps named after the table (items.csv,
+npcs.xml, ...). Each is loaded once into a sorted int64 array. The arrays
+are cached in one binary file, and a table is re-read only when its
+source's mtime or size changes, so startup costs a header read plus a
+bulk copy per table. Lookups are C-level binary searches.
+"""
+import csv
+import json
+import os
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_left
+
+from quest_xml import atomic_write
+
+# Table names recognized by find_id_tables, by file stem
+ID_TABLE_NAMES = ("items", "npcs", "monsters", "maps")
+ID_TABLE_FORMATS = (".csv", ".xml")
+
+# Default cache file name, stored next to the tables
+XREF_CACHE_FILE_NAME = ".quest_xref.cache"
+
+# (section or None for basic fields, field, tables the value may come from, row filter)
+XREF_FIELDS = (
+    (None, "StartTargetID", ("npcs",), None),
+    (None, "TargetValue", ("npcs",), None),
+    ("goals", "GoalId", ("monsters", "items", "npcs", "maps"), None),
+    # Money rewards do not write RewardItem
+    ("rewards", "RewardItem", ("items",), lambda row: row["RewardType"] != 0),
+)
+
+
+def _int_or_none(text):
+    try:
+        return int(str(text).strip())
+    except ValueError:
+        return None
+
+
+def read_csv_ids(path):
+    """IDs from a CSV dump: the first column whose header ends in "id", else column 0"""
+    ids = []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        column = 0
+        first = True
+        for row in reader:
+            if not row:
+                continue
+            if first:
+                first = False
+                if not any(_int_or_none(cell) is not None for cell in row):
+                    # Header row: pick the ID column by name
+                    column = next((i for i, name in enumerate(row) if name.strip().lower().endswith("id")), 0)
+                    continue
+            if column < len(row):
+                value = _int_or_none(row[column])
+                if value is not None:
+                    ids.append(value)
+    return ids
+
+
+def read_xml_ids(path):
+    """IDs from an XML dump: id/ID attributes, or the text of <Id>/<ID> elements"""
+    ids = []
+    for _, elem in ET.iterparse(path):
+        value = None
+        for key, text in elem.attrib.items():
+            if key.lower() == "id":
+                value = _int_or_none(text)
+        if value is None and elem.tag.lower() == "id":
+            value = _int_or_none(elem.text or "")
+        if value is not None:
+            ids.append(value)
+        if len(elem):
+            elem.clear()
+    return ids
+
+
+def load_id_table(path):
+    """Sorted, deduplicated int64 array of the IDs in a CSV or XML dump"""
+    ids = read_xml_ids(path) if path.lower().endswith(".xml") else read_csv_ids(path)
+    return array("q", sorted(set(ids)))
+
+
+class IdTable:
+    """Sorted ID array with membership by binary search"""
+
+    def __init__(self, name, ids):
+        self.name = name
+        self.ids = ids
+
+    def __contains__(self, value):
+        index = bisect_left(self.ids, value)
+        return index < len(self.ids) and self.ids[index] == value
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def find_id_tables(directory):
+    """{table name: path} for the recognized table dumps in a directory"""
+    tables = {}
+    for entry in sorted(os.listdir(directory)):
+        stem, ext = os.path.splitext(entry)
+        if stem.lower() in ID_TABLE_NAMES and ext.lower() in ID_TABLE_FORMATS:
+            tables[stem.lower()] = os.path.join(directory, entry)
+    return tables
+
+
+class XrefIndex:
+    """ID tables plus the quest fields that must reference them"""
+
+    def __init__(self, tables, cache_path=None):
+        self.tables = {}
+        self.cache_path = cache_path
+        self.loaded_from_cache = []
+        # Why the cache could not be written, if it could not; the tables still load
+        self.cache_error = None
+        cached = self._read_cache()
+        changed = False
+        for name, path in tables.items():
+            st = os.stat(path)
+            stamp = [os.path.abspath(path), st.st_mtime_ns, st.st_size]
+            entry = cached.get(name)
+            if entry and entry[0] == stamp:
+                ids = entry[1]
+                self.loaded_from_cache.append(name)
+            else:
+                ids = load_id_table(path)
+                changed = True
+            self.tables[name] = IdTable(name, ids)
+            cached[name] = (stamp, ids)
+        if changed or set(cached) != set(tables):
+            self._write_cache({name: cached[name] for name in tables})
+
+    def _read_cache(self):
+        """{name: (stamp, ids)} from the cache file; empty if missing or unreadable"""
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "rb") as f:
+                header = json.loads(f.readline())
+                cached = {}
+                for table in header["tables"]:
+                    ids = array("q")
+                    ids.frombytes(f.read(table["count"] * ids.itemsize))
+                    if len(ids) != table["count"]:
+                        return {}
+                    cached[table["name"]] = (table["stamp"], ids)
+                return cached
+        except (OSError, ValueError, KeyError, TypeError):
+            return {}
+
+    def _write_cache(self, cached):
+        if not self.cache_path:
+            return
+        header = {"tables": [{"name": name, "stamp": stamp, "count": len(ids)}
+                             for name, (stamp, ids) in cached.items()]}
+        try:
+            with atomic_write(self.cache_path, binary=True) as f:
+                f.write(json.dumps(header).encode("utf-8") + b"\n")
+                for _, ids in cached.values():
+                    f.write(ids.tobytes())
+        except OSError as e:
+            self.cache_error = f"could not write ID table cache {self.cache_path}: {e}"
+
+    def known(self, table_names, value):
+        """True if value is in any of the named tables that are loaded"""
+        return any(value in self.tables[name] for name in table_names if name in self.tables)
+
+    def _unknown(self, table_names, value):
+        """Message for a non-zero value missing from every loaded candidate table"""
+        loaded = [name for name in table_names if name in self.tables]
+        if not loaded or not value or self.known(loaded, value):
+            return None
+        return f"{value} is not in {' / '.join(loaded)}"
+
+    def check_field(self, name, value):
+        """Message if a basic field references an unknown ID, else None"""
+        value = _int_or_none(value)
+        for section, field_name, table_names, _ in XREF_FIELDS:
+            if section is None and field_name == name and value is not None:
+                message = self._unknown(table_names, value)
+                if message:
+                    return f"{name} {message}"
+        return None
+
+    def check_row(self, section, values):
+        """Messages for unknown IDs in one row (field -> int mapping)"""
+        messages = []
+        for rule_section, field_name, table_names, applies in XREF_FIELDS:
+            if rule_section == section and (applies is None or applies(values)):
+                message = self._unknown(table_names, values[field_name])
+                if message:
+                    messages.append(f"{field_name} {message}")
+        return messages
+
+    def check_quest(self, quest):
+        """Messages for every unknown ID in a quest"""
+        messages = []
+        for section, field_name, _, _ in XREF_FIELDS:
+            if section is None:
+                message = self.check_field(field_name, quest.get_field(field_name))
+                if message:
+                    messages.append(message)
+        for section in ("conditions", "goals", "rewards"):
+            if not any(rule[0] == section for rule in XREF_FIELDS):
+                continue
+            for position, row in enumerate(getattr(quest, section)):
+                messages.extend(f"{section[:-1]} #{position + 1}: {message}"
+                                for message in self.check_row(section, row.to_dict()))
+        return messages
+
+    def check_quests(self, quests):
+        """(quest position, UniqID, message) for every unknown ID across quests"""
+        return [(index, quest.UniqID, message)
+                for index, quest in enumerate(quests)
+                for message in self.check_quest(quest)]
+
+
+def load_id_tables(directory, cache_path=None):
+    """XrefIndex over the table dumps in directory, cached alongside them"""
+    return XrefIndex(find_id_tables(directory), cache_path or os.path.join(directory, XREF_CACHE_FILE_NAME))